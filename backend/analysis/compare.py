@@ -172,235 +172,624 @@
     
 #     return pk_values
 
+import logging
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+
+from .dates import parse_dates, DATE_GRANULARITIES
+from .exception_table import ExceptionTable, CHANGE_TYPE_ORDER
+from .instrumentation import stage
+from .mapping import compile_plan
+from .parallel import compare_columns_parallel
+
+logger = logging.getLogger(__name__)
+
+# Below this many matched records a process pool costs more than it saves
+PARALLEL_MIN_ROWS = 100_000
+
+class DuplicateKeyError(ValueError):
+    """Raised under the 'reject' duplicate_keys policy when either input repeats a primary key."""
+
+# Composite surrogate keys are re-densified before they could reach this
+_SURROGATE_KEY_LIMIT = 2 ** 62
 
 def run_compare(df_old, df_new, pk_cols, cfg=None):
     """
     Compare df_old vs. df_new on the key(s) in pk_cols.
-    Returns dict with match_pct and exceptions list.
+    Returns dict with match_pct, exceptions (an ExceptionTable) and stats.
     
     Args:
         df_old: Old dataset
         df_new: New dataset 
         pk_cols: Primary key column(s) for joining
-        cfg: Configuration dict with comparison rules and null handling
+        cfg: ComparisonPlan from mapping.load_mapping, or a configuration
+             dict with comparison rules and null handling (compiled per call)
     
     Config options:
         - ignore_nulls: If True, null vs null = match, null vs value = ignore
         - include_missing_records: If True, include missing records as exceptions
+        - parallel_workers: If > 1, compare columns across this many processes
+        - duplicate_keys: What to do with primary keys repeated within one input
+          (reject, keep_first, keep_last or pair, see _resolve_duplicate_keys)
+        - prefilter: If False, compare every row even when its values are
+          identical on both sides (see changed_rows)
+        - summary_only: If True, only count exceptions; the returned table is
+          empty and stats carry exception_count and field_exception_counts
         - fields: Field-specific comparison rules
     """
     try:
-        print(f"Starting comparison with PK columns: {pk_cols}")
-        print(f"Old DF shape: {df_old.shape}, New DF shape: {df_new.shape}")
+        logger.debug("Starting comparison with PK columns %s: old shape %s, new shape %s",
+                     pk_cols, df_old.shape, df_new.shape)
         
         # Get configuration settings with defaults
-        ignore_nulls = (cfg or {}).get('ignore_nulls', False)
-        include_missing_records = (cfg or {}).get('include_missing_records', False)
-        
-        print(f"Configuration - ignore_nulls: {ignore_nulls}, include_missing_records: {include_missing_records}")
+        plan = compile_plan(cfg)
+        ignore_nulls = plan.ignore_nulls
+        include_missing_records = plan.include_missing_records
+        summary_only = plan.summary_only
         
-        # 1) Merge to find what records exist where
-        merged = df_old.merge(
-            df_new,
-            on=pk_cols,
-            suffixes=('_old', '_new'),
-            how='outer',
-            indicator=True
-        )
-        print(f"Merged DF shape: {merged.shape}")
+        logger.debug("Configuration - ignore_nulls: %s, include_missing_records: %s, summary_only: %s",
+                     ignore_nulls, include_missing_records, summary_only)
         
-        # 2) Split into different categories
-        both_records = merged[merged['_merge'] == 'both'].copy()
-        old_only = merged[merged['_merge'] == 'left_only'].copy()
-        new_only = merged[merged['_merge'] == 'right_only'].copy()
+        # 1) Repeated primary keys would multiply out in the merge, so they are
+        #    reported and resolved by policy first
+        duplicates = _duplicate_key_exceptions(df_old, df_new, pk_cols)
+        merge_keys = pk_cols
+        if duplicates:
+            dup_old = int((duplicates.frame['old'] > 1).sum())
+            dup_new = int((duplicates.frame['new'] > 1).sum())
+            logger.warning("Duplicate primary keys - old: %d, new: %d (policy: %s)", dup_old, dup_new,
+                           plan.duplicate_keys, extra={"rows": dup_old + dup_new})
+            if plan.duplicate_keys == 'reject':
+                example = ", ".join(f"{k}={duplicates.frame[k].iloc[0]}" for k in pk_cols)
+                raise DuplicateKeyError(
+                    f"Primary key {pk_cols} is not unique: {dup_old} repeated value(s) in the old file "
+                    f"and {dup_new} in the new file, e.g. {example}"
+                )
+            df_old, df_new, merge_keys = _resolve_duplicate_keys(df_old, df_new, pk_cols, plan.duplicate_keys)
+        else:
+            dup_old = dup_new = 0
+
+        # 2) Merge to find what records exist where
+        with stage('merge'):
+            merged, record_keys = _merge_on_keys(df_old, df_new, merge_keys)
+            logger.debug("Merged DF shape: %s", merged.shape, extra={"stage": "merge", "rows": len(merged)})
+
+            # 3) Split into different categories
+            both_records = merged[merged['_merge'] == 'both'].copy()
+            old_only = merged[merged['_merge'] == 'left_only'].copy()
+            new_only = merged[merged['_merge'] == 'right_only'].copy()
         
-        print(f"Records in both: {len(both_records)}")
-        print(f"Records only in old: {len(old_only)}")
-        print(f"Records only in new: {len(new_only)}")
+        logger.debug("Records in both: %d, only in old: %d, only in new: %d",
+                     len(both_records), len(old_only), len(new_only))
         
-        # 3) Get columns to compare (exclude PKs)
-        compare_cols = [c for c in df_old.columns if c not in pk_cols]
-        print(f"Columns to compare: {compare_cols}")
+        # 4) Get columns to compare (exclude PKs)
+        compare_cols = [c for c in df_old.columns if c not in merge_keys]
+        logger.debug("Columns to compare: %s", compare_cols)
         
-        exceptions = []
+        exceptions = [] if summary_only else [duplicates]
+        exception_count = len(duplicates)
         
-        # 4) Handle missing records based on configuration
+        # 5) Handle missing records based on configuration
         if include_missing_records:
+            exception_count += len(old_only) + len(new_only)
+        if include_missing_records and not summary_only:
             # Add missing records as exceptions
-            for idx in old_only.index:
-                pk_vals = {k: old_only.loc[idx, k] for k in pk_cols}
-                exceptions.append({
-                    **pk_vals,
-                    "field": "_record_status",
-                    "old": "EXISTS",
-                    "new": "MISSING",
-                    "change_type": "deleted_record"
-                })
-            
-            for idx in new_only.index:
-                pk_vals = {k: new_only.loc[idx, k] for k in pk_cols}
-                exceptions.append({
-                    **pk_vals,
-                    "field": "_record_status", 
-                    "old": "MISSING",
-                    "new": "EXISTS",
-                    "change_type": "added_record"
-                })
-        else:
+            exceptions.append(ExceptionTable.from_records(
+                record_keys(old_only), pk_cols, "_record_status", "EXISTS", "MISSING", "deleted_record"
+            ))
+            exceptions.append(ExceptionTable.from_records(
+                record_keys(new_only), pk_cols, "_record_status", "MISSING", "EXISTS", "added_record"
+            ))
+        elif not include_missing_records:
             # Just log missing records for information
-            print(f"Records only in old (deleted): {len(old_only)}")
-            print(f"Records only in new (added): {len(new_only)}")
-        
-        # 5) Compare fields for records that exist in both
-        field_exceptions = 0
+            logger.debug("Not reported - records only in old (deleted): %d, only in new (added): %d",
+                         len(old_only), len(new_only))
         
+        # 6) Compare fields for records that exist in both
+        active_compare_cols = []
         for col in compare_cols:
-            old_col = f"{col}_old"
-            new_col = f"{col}_new"
-            rules = (cfg or {}).get('fields', {}).get(col, {})
-            
             # Skip ignored fields
-            if rules.get('type') == 'ignore':
-                print(f"Skipping ignored column: {col}")
+            if col in plan.ignored:
+                logger.debug("Skipping ignored column: %s", col)
                 continue
-            
-            print(f"Comparing column: {col}")
-            
-            # Apply comparison rules
-            if rules.get('type') == 'string' and 'fuzzy_match' in rules:
-                # Fuzzy string comparison
-                threshold = rules['fuzzy_match']
-                mismatches = _find_fuzzy_mismatches(both_records, old_col, new_col, threshold, ignore_nulls)
-                
-            elif rules.get('type') == 'decimal' and 'tolerance' in rules:
-                # Decimal tolerance comparison
-                tolerance = rules['tolerance']
-                mismatches = _find_decimal_mismatches(both_records, old_col, new_col, tolerance, ignore_nulls)
-                
-            else:
-                # Exact comparison (default)
-                mismatches = _find_exact_mismatches(both_records, old_col, new_col, ignore_nulls)
-            
-            # Add mismatches to exceptions (SAME FORMAT AS BEFORE)
-            for idx in mismatches:
-                pk_vals = {k: both_records.loc[idx, k] for k in pk_cols}
-                exceptions.append({
-                    **pk_vals,
-                    "field": col,
-                    "old": both_records.loc[idx, old_col],
-                    "new": both_records.loc[idx, new_col]
-                    # NO change_type field - keeps same format as before
-                })
-                field_exceptions += 1
+            active_compare_cols.append(col)
+
+        # Rows whose compared values are identical on both sides cannot produce
+        # field exceptions. The prefilter costs about as much as exact
+        # comparisons, so it only runs when a costlier comparator would see
+        # rows it can skip
+        if plan.get('prefilter', True) and len(both_records) and any(plan.field(col).comparator != 'exact' for col in active_compare_cols):
+            with stage('prefilter'):
+                changed_records = both_records[changed_rows(both_records, active_compare_cols, plan)]
+            logger.debug("Records with changes: %d of %d", len(changed_records), len(both_records),
+                         extra={"stage": "prefilter", "rows": len(changed_records)})
+        else:
+            changed_records = both_records
+
+        workers = _resolve_workers(plan, len(changed_records), len(active_compare_cols))
+        if workers > 1:
+            logger.debug("Comparing %d columns across %d worker processes", len(active_compare_cols), workers)
+            with stage('compare:parallel'):
+                masks = compare_columns_parallel(
+                    changed_records, active_compare_cols, plan, ignore_nulls, workers
+                )
+        else:
+            masks = None
+
+        field_exceptions = 0
+        field_exception_counts = {}
+        for col in active_compare_cols:
+            old_col = f"{col}_old"
+            new_col = f"{col}_new"
+
+            with stage(f'compare:{col}'):
+                if masks is not None:
+                    mask = masks[col]
+                else:
+                    logger.debug("Comparing column: %s", col)
+                    mask = _column_mismatch_mask(
+                        changed_records[old_col], changed_records[new_col], plan.field(col), ignore_nulls
+                    )
+                field_exception_counts[col] = int(np.count_nonzero(mask))
+                field_exceptions += field_exception_counts[col]
+                if summary_only:
+                    continue
+
+                # Field differences carry no change_type
+                mismatched = changed_records[mask]
+                exceptions.append(ExceptionTable.from_records(
+                    record_keys(mismatched), pk_cols, col, mismatched[old_col], mismatched[new_col]
+                ))
+        exception_count += field_exceptions
         
-        # 6) Calculate accurate match percentage
+        # 7) Calculate accurate match percentage
         # Only count field comparisons for records that exist in both datasets
-        active_compare_cols = [c for c in compare_cols 
-                              if (cfg or {}).get('fields', {}).get(c, {}).get('type') != 'ignore']
-        
         total_field_comparisons = len(both_records) * len(active_compare_cols)
+        match_pct = _match_pct(total_field_comparisons, field_exceptions)
+        exceptions = ExceptionTable.concat(exceptions, pk_cols)
         
-        if total_field_comparisons > 0:
-            match_pct = round(100 * (total_field_comparisons - field_exceptions) / total_field_comparisons, 2)
-        else:
-            match_pct = 100.0  # No comparisons = perfect match
-        
-        print(f"Comparison completed:")
-        print(f"  - Field exceptions: {field_exceptions}")
-        print(f"  - Total exceptions: {len(exceptions)}")
-        print(f"  - Match percentage: {match_pct}%")
+        logger.info("Comparison completed: %d field exceptions, %d total exceptions, match %s%%",
+                    field_exceptions, exception_count, match_pct, extra={"rows": len(merged)})
         
         return {
             "match_pct": match_pct, 
-            "exceptions": exceptions
+            "exceptions": exceptions,
+            "stats": {
+                "records_in_both": len(both_records),
+                "records_only_old": len(old_only),
+                "records_only_new": len(new_only),
+                "compared_fields": active_compare_cols,
+                "field_comparisons": total_field_comparisons,
+                "field_exceptions": field_exceptions,
+                "field_exception_counts": field_exception_counts,
+                "exception_count": exception_count,
+                "duplicate_keys_old": dup_old,
+                "duplicate_keys_new": dup_new,
+            }
         }
         
     except Exception as e:
-        print(f"Critical error in run_compare: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Critical error in run_compare: %s", e)
         raise
 
+def _duplicate_key_exceptions(df_old, df_new, pk_cols):
+    """
+    One 'duplicate_key' exception per primary key value that occurs more than
+    once on either side, with old/new holding the number of rows carrying it
+    in each input, ordered by key.
+
+    Uniqueness is checked with one hash pass per side; rows are only counted
+    per key when a repeat was found.
+    """
+    if not _has_duplicate_keys(df_old, pk_cols) and not _has_duplicate_keys(df_new, pk_cols):
+        return ExceptionTable(None, pk_cols)
+
+    codes_old, codes_new, levels = _surrogate_keys(df_old, df_new, pk_cols)
+    ids, codes = pd.factorize(np.concatenate([codes_old, codes_new]))
+    old_counts = np.bincount(ids[:len(codes_old)], minlength=len(codes))
+    new_counts = np.bincount(ids[len(codes_old):], minlength=len(codes))
+
+    repeated = np.flatnonzero((old_counts > 1) | (new_counts > 1))
+    repeated = repeated[np.argsort(codes[repeated], kind='stable')]
+    return ExceptionTable.from_records(
+        _decode_keys(codes[repeated], levels), pk_cols, "_duplicate_key",
+        pd.Series(old_counts[repeated]), pd.Series(new_counts[repeated]), "duplicate_key"
+    )
+
+def _has_duplicate_keys(df, pk_cols):
+    if len(pk_cols) == 1:
+        return not df[pk_cols[0]].is_unique
+    return bool(df.duplicated(subset=pk_cols).any())
+
+def _resolve_duplicate_keys(df_old, df_new, pk_cols, policy):
+    """
+    Make the merge one-to-one so its size stays bounded by the inputs.
+    Returns both frames and the columns to merge on:
+        - keep_first / keep_last: keep one row per key on each side
+        - pair: match the n-th row of a key in old with the n-th row of that
+          key in new; surplus rows become old-only or new-only records
+    """
+    if policy in ('keep_first', 'keep_last'):
+        keep = policy.split('_')[1]
+        return (df_old.drop_duplicates(subset=pk_cols, keep=keep),
+                df_new.drop_duplicates(subset=pk_cols, keep=keep), pk_cols)
+
+    df_old = df_old.assign(_pk_occurrence=df_old.groupby(pk_cols, dropna=False, sort=False).cumcount())
+    df_new = df_new.assign(_pk_occurrence=df_new.groupby(pk_cols, dropna=False, sort=False).cumcount())
+    return df_old, df_new, [*pk_cols, '_pk_occurrence']
+
+def _merge_on_keys(df_old, df_new, pk_cols):
+    """
+    Outer merge of the two frames on their primary key, with an indicator.
+
+    Composite keys are replaced by one int64 surrogate (see _surrogate_keys)
+    so the join hashes a single integer column instead of tuples of mixed
+    objects, and the key columns are left out of the merged frame. Returns
+    the merged frame and a function that decodes the key values for any
+    subset of its rows; only rows that become exceptions need them.
+    """
+    if len(pk_cols) < 2:
+        merged = df_old.merge(df_new, on=pk_cols, suffixes=('_old', '_new'), how='outer', indicator=True)
+        return merged, lambda records: records
+
+    # Let pandas reject incompatible key dtypes exactly as a key merge would
+    df_old[pk_cols].iloc[:0].merge(df_new[pk_cols].iloc[:0], on=pk_cols)
+
+    codes_old, codes_new, levels = _surrogate_keys(df_old, df_new, pk_cols)
+    merged = df_old.drop(columns=pk_cols).assign(_pk_code=codes_old).merge(
+        df_new.drop(columns=pk_cols).assign(_pk_code=codes_new),
+        on='_pk_code', suffixes=('_old', '_new'), how='outer', indicator=True
+    )
+    return merged, lambda records: _decode_keys(records['_pk_code'].to_numpy(), levels)
+
+def _surrogate_keys(df_old, df_new, pk_cols):
+    """
+    Encode a composite primary key as one int64 per row of each frame.
+
+    Each key column is factorized jointly over both frames with sorted codes,
+    and the codes are folded into a mixed-radix running key. Nulls get the
+    code a merge on the key columns sorts them at: first in datetime-like
+    columns (ordered by their int64 values, where NaT is the smallest), last
+    in any other. The running key is only re-factorized when the next column
+    could push it out of int64 range. Equal key tuples get equal codes and
+    codes sort like the tuples, so an outer merge on them returns rows in the
+    same order as a merge on the key columns.
+
+    Returns the codes of each frame and the levels _decode_keys needs to turn
+    codes back into key values, with each column's joint dtype and null.
+    """
+    n_old = len(df_old)
+    key = np.zeros(n_old + len(df_new), dtype=np.int64)
+    key_range = 1
+    levels = []
+    for col in pk_cols:
+        # Joined like the merge joins them, e.g. float64 for int64 with float64
+        values = pd.concat([df_old[col], df_new[col]], ignore_index=True)
+        codes, uniques = pd.factorize(values, sort=True)
+        null = codes < 0
+        radix = len(uniques) + 1
+        if pd.api.types.is_datetime64_any_dtype(values) or pd.api.types.is_timedelta64_dtype(values):
+            null_code = 0
+            codes += 1
+        else:
+            null_code = len(uniques)
+        codes[null] = null_code
+        # Object columns may hold None or NaN; keep the one the data uses
+        null_value = values[null].iloc[0] if values.dtype == object and null.any() else None
+
+        if key_range * radix >= _SURROGATE_KEY_LIMIT:
+            key, dense = pd.factorize(key, sort=True)
+            key_range = len(dense)
+            levels.append((None, dense, None, None))
+        key *= radix
+        key += codes
+        key_range *= radix
+        levels.append((col, pd.Index(uniques, dtype=values.dtype), null_code, null_value))
+    return key[:n_old], key[n_old:], levels
+
+def _decode_keys(codes, levels):
+    """Primary key values (one column per key field) for surrogate codes."""
+    keys = {}
+    for col, uniques, null_code, null_value in reversed(levels):
+        if col is None:
+            # Undo a re-factorization of the running key
+            codes = uniques[codes]
+            continue
+        codes, digits = np.divmod(codes, len(uniques) + 1)
+        null = digits == null_code
+        positions = np.where(null, -1, digits - 1 if null_code == 0 else digits)
+        # Filled positions get the dtype's own null: NaN, NaT or <NA>
+        values = pd.api.extensions.take(uniques.array, positions, allow_fill=True)
+        if uniques.dtype == object and null.any():
+            values = values.to_numpy(copy=True)
+            values[null] = null_value
+        keys[col] = pd.Series(values, dtype=uniques.dtype)
+    return pd.DataFrame({col: keys[col] for col, *_ in levels if col is not None})
+
+def combine_results(results):
+    """
+    Combine run_compare results computed over disjoint sets of primary keys
+    (e.g. hash partitions or key ranges) into one result.
+
+    match_pct is recomputed from the summed field counts, so it is identical
+    to a single run over all rows. Exceptions are put in the order a single
+    run produces: record-level exceptions first, then field exceptions grouped
+    by column, each group sorted by primary key.
+    """
+    stats = {
+        "records_in_both": 0,
+        "records_only_old": 0,
+        "records_only_new": 0,
+        "compared_fields": [],
+        "field_comparisons": 0,
+        "field_exceptions": 0,
+        "field_exception_counts": {},
+        "exception_count": 0,
+        "duplicate_keys_old": 0,
+        "duplicate_keys_new": 0,
+    }
+    tables = []
+    for result in results:
+        for key in ("records_in_both", "records_only_old", "records_only_new", "field_comparisons",
+                    "field_exceptions", "exception_count", "duplicate_keys_old", "duplicate_keys_new"):
+            stats[key] += result["stats"][key]
+        for col, count in result["stats"]["field_exception_counts"].items():
+            stats["field_exception_counts"][col] = stats["field_exception_counts"].get(col, 0) + count
+        for col in result["stats"]["compared_fields"]:
+            if col not in stats["compared_fields"]:
+                stats["compared_fields"].append(col)
+        tables.append(result["exceptions"])
+
+    exceptions = ExceptionTable.concat(tables)
+    frame = exceptions.frame
+    if len(frame):
+        field_rank = {col: len(CHANGE_TYPE_ORDER) + i for i, col in enumerate(stats["compared_fields"])}
+        rank = frame['change_type'].map(CHANGE_TYPE_ORDER)
+        rank = rank.fillna(frame['field'].map(field_rank)).fillna(len(CHANGE_TYPE_ORDER) + len(field_rank))
+        frame = frame.assign(_rank=rank.astype('int64'))
+        try:
+            frame = frame.sort_values(['_rank', *exceptions.pk_cols], kind='stable')
+        except TypeError:
+            # Keys of mixed types cannot be ordered; keep the grouping only
+            frame = frame.sort_values('_rank', kind='stable')
+        exceptions = ExceptionTable(frame.drop(columns='_rank').reset_index(drop=True), exceptions.pk_cols)
+
+    return {
+        "match_pct": _match_pct(stats["field_comparisons"], stats["field_exceptions"]),
+        "exceptions": exceptions,
+        "stats": stats,
+    }
+
+def changed_rows(both_records, compare_cols, cfg=None):
+    """
+    Boolean mask of the merged rows where any compared column differs between
+    its old and new side: values that are not equal, or null on one side
+    only. Rows outside the mask hold identical values in every compared
+    column and cannot produce field exceptions.
+
+    Each column costs one vectorized inequality, far less than hashing it
+    (strings in particular) would. Decimal values that are present but not
+    numeric always count as a mismatch in that comparator, so their rows are
+    marked changed as well.
+    """
+    plan = compile_plan(cfg)
+    changed = np.zeros(len(both_records), dtype=bool)
+    for col in compare_cols:
+        old_vals = both_records[f"{col}_old"]
+        new_vals = both_records[f"{col}_new"]
+        changed |= _exact_mismatch_mask(old_vals, new_vals)
+        if plan.field(col).comparator == 'decimal':
+            for vals in (old_vals, new_vals):
+                if not pd.api.types.is_numeric_dtype(vals):
+                    changed |= vals.notna().to_numpy() & pd.to_numeric(vals, errors='coerce').isna().to_numpy()
+    return changed
+
+def _match_pct(total_field_comparisons, field_exceptions):
+    """Percentage of field comparisons that matched."""
+    if total_field_comparisons > 0:
+        return round(100 * (total_field_comparisons - field_exceptions) / total_field_comparisons, 2)
+    return 100.0  # No comparisons = perfect match
+
+def _resolve_workers(plan, n_rows, n_cols):
+    """
+    Number of worker processes to use for column comparison.
+    Parallel mode is opt-in via the parallel_workers setting and only kicks in
+    when there is enough work to pay for starting the pool.
+    """
+    workers = plan.parallel_workers
+    if workers <= 1 or n_cols < 2 or n_rows < PARALLEL_MIN_ROWS:
+        return 1
+    return min(workers, n_cols)
+
+def _column_mismatch_mask(old_vals, new_vals, field, ignore_nulls=False):
+    """
+    Apply the comparator compiled for one field (a mapping.FieldPlan) to two
+    aligned Series.
+    Returns a boolean numpy array that is True where the pair is an exception.
+    """
+    try:
+        if field.comparator == 'fuzzy':
+            # Fuzzy string comparison
+            return _fuzzy_mismatch_mask(old_vals, new_vals, field.fuzzy_match, ignore_nulls)
+
+        elif field.comparator == 'decimal':
+            # Decimal tolerance comparison (absolute, relative and/or ulps)
+            mismatch, non_numeric = _decimal_mismatch_masks(
+                old_vals, new_vals, field.tolerance, field.relative_tolerance, field.ulps, ignore_nulls
+            )
+            if non_numeric.any():
+                logger.info("Non-numeric values in %s/%s: %d rows", old_vals.name, new_vals.name,
+                            np.count_nonzero(non_numeric))
+            return mismatch | non_numeric
+
+        elif field.comparator == 'date':
+            # Date comparison at the configured granularity
+            return _date_mismatch_mask(old_vals, new_vals, field.formats, field.granularity, ignore_nulls)
+
+        else:
+            # Exact comparison (default)
+            return _exact_mismatch_mask(old_vals, new_vals, ignore_nulls)
+
+    except Exception as e:
+        logger.exception("Error comparing %s/%s: %s", old_vals.name, new_vals.name, e)
+        return np.zeros(len(old_vals), dtype=bool)
+
 def _find_exact_mismatches(df, old_col, new_col, ignore_nulls=False):
     """Find rows where values don't match exactly."""
     try:
-        mismatches = []
-        for idx in df.index:
-            old_val = df.loc[idx, old_col]
-            new_val = df.loc[idx, new_col]
-            
-            # Handle null values based on configuration
-            if pd.isna(old_val) and pd.isna(new_val):
-                continue  # Both null = always match
-            elif pd.isna(old_val) or pd.isna(new_val):
-                if ignore_nulls:
-                    continue  # Ignore null vs value differences
-                else:
-                    mismatches.append(idx)  # Null vs value = mismatch
-            else:
-                # Both have values - compare them
-                if old_val != new_val:
-                    mismatches.append(idx)
-        
-        return mismatches
+        mask = _exact_mismatch_mask(df[old_col], df[new_col], ignore_nulls)
+        return df.index[mask].tolist()
     except Exception as e:
-        print(f"Error in exact comparison: {e}")
+        logger.exception("Error in exact comparison: %s", e)
         return []
 
+def _exact_mismatch_mask(old_vals, new_vals, ignore_nulls=False):
+    """
+    Columnar exact comparison of two aligned Series.
+    Returns a boolean numpy array that is True where the pair is a mismatch.
+    """
+    old_null = old_vals.isna().to_numpy()
+    new_null = new_vals.isna().to_numpy()
+    both_present = ~old_null & ~new_null
+
+    try:
+        differs = old_vals != new_vals
+    except TypeError:
+        # e.g. categoricals with different categories cannot be compared directly
+        differs = old_vals.astype(object) != new_vals.astype(object)
+    differs = differs.to_numpy(dtype=bool, na_value=True)
+
+    return (both_present & differs) | _null_mismatch_mask(old_null, new_null, ignore_nulls)
+
+def _null_mismatch_mask(old_null, new_null, ignore_nulls=False):
+    """
+    Null handling shared by all comparators: null vs null is always a match,
+    null vs value is a mismatch unless ignore_nulls is set.
+    """
+    if ignore_nulls:
+        return np.zeros(len(old_null), dtype=bool)
+    return old_null != new_null
+
 def _find_fuzzy_mismatches(df, old_col, new_col, threshold, ignore_nulls=False):
     """Find rows where fuzzy match is below threshold."""
-    mismatches = []
     try:
-        for idx in df.index:
-            old_val = df.loc[idx, old_col]
-            new_val = df.loc[idx, new_col]
-            
-            # Handle null values based on configuration
-            if pd.isna(old_val) and pd.isna(new_val):
-                continue  # Both null = match
-            elif pd.isna(old_val) or pd.isna(new_val):
-                if ignore_nulls:
-                    continue  # Ignore null vs value differences
-                else:
-                    mismatches.append(idx)  # Null vs value = mismatch
-            else:
-                # Compare using fuzzy ratio
-                if fuzz.ratio(str(old_val), str(new_val)) < threshold:
-                    mismatches.append(idx)
+        mask = _fuzzy_mismatch_mask(df[old_col], df[new_col], threshold, ignore_nulls)
+        return df.index[mask].tolist()
     except Exception as e:
-        print(f"Error in fuzzy comparison: {e}")
-    
-    return mismatches
+        logger.exception("Error in fuzzy comparison: %s", e)
+        return []
+
+def _fuzzy_mismatch_mask(old_vals, new_vals, threshold, ignore_nulls=False):
+    """
+    Columnar fuzzy comparison of two aligned Series.
+
+    Low-cardinality columns repeat the same (old, new) pairs many times, so the
+    pairs are factorized first and each distinct pair is scored once with
+    rapidfuzz's batched cpdist. Scores are then broadcast back to the rows.
+    """
+    old_null = old_vals.isna().to_numpy()
+    new_null = new_vals.isna().to_numpy()
+    both_present = ~old_null & ~new_null
+
+    mask = _null_mismatch_mask(old_null, new_null, ignore_nulls)
+    if both_present.any():
+        old_codes, old_uniques = pd.factorize(old_vals[both_present].astype(str))
+        new_codes, new_uniques = pd.factorize(new_vals[both_present].astype(str))
 
-def _find_decimal_mismatches(df, old_col, new_col, tolerance, ignore_nulls=False):
+        # Encode each (old, new) pair as one integer and factorize that
+        pair_keys = old_codes.astype(np.int64) * len(new_uniques) + new_codes
+        pair_codes, unique_keys = pd.factorize(pair_keys)
+        old_choice, new_choice = np.divmod(unique_keys, len(new_uniques))
+
+        # score_cutoff lets rapidfuzz bail out early; anything below it scores 0
+        scores = process.cpdist(
+            list(old_uniques[old_choice]),
+            list(new_uniques[new_choice]),
+            scorer=fuzz.ratio,
+            score_cutoff=threshold,
+        )
+        mask[both_present] = scores[pair_codes] < threshold
+    return mask
+
+def _find_decimal_mismatches(df, old_col, new_col, tolerance, ignore_nulls=False,
+                             relative_tolerance=None, ulps=None):
     """Find rows where decimal difference exceeds tolerance."""
-    mismatches = []
     try:
-        for idx in df.index:
-            old_val = df.loc[idx, old_col]
-            new_val = df.loc[idx, new_col]
-            
-            # Handle null values based on configuration
-            if pd.isna(old_val) and pd.isna(new_val):
-                continue  # Both null = match
-            elif pd.isna(old_val) or pd.isna(new_val):
-                if ignore_nulls:
-                    continue  # Ignore null vs value differences
-                else:
-                    mismatches.append(idx)  # Null vs value = mismatch
-            else:
-                try:
-                    if abs(float(old_val) - float(new_val)) > tolerance:
-                        mismatches.append(idx)
-                except (ValueError, TypeError):
-                    # Can't convert to numbers = mismatch
-                    mismatches.append(idx)
+        mismatch, non_numeric = _decimal_mismatch_masks(
+            df[old_col], df[new_col], tolerance, relative_tolerance, ulps, ignore_nulls
+        )
+        if non_numeric.any():
+            logger.info("Non-numeric values in %s/%s: %d rows", old_col, new_col, np.count_nonzero(non_numeric))
+        return df.index[mismatch | non_numeric].tolist()
     except Exception as e:
-        print(f"Error in decimal comparison: {e}")
-    
-    return mismatches
+        logger.exception("Error in decimal comparison: %s", e)
+        return []
+
+def _decimal_mismatch_masks(old_vals, new_vals, tolerance=None, relative_tolerance=None,
+                            ulps=None, ignore_nulls=False):
+    """
+    Columnar numeric comparison of two aligned Series.
+
+    Each column is coerced once with pd.to_numeric. A pair matches when the
+    absolute difference is within the widest configured band:
+        - tolerance: absolute difference
+        - relative_tolerance: percent of the larger magnitude
+        - ulps: units in the last place of the larger magnitude
+
+    Returns (mismatch, non_numeric) boolean numpy arrays. non_numeric marks
+    rows where both values are present but at least one could not be coerced
+    to a number; those rows are not part of the mismatch mask.
+    """
+    old_num = pd.to_numeric(old_vals, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    new_num = pd.to_numeric(new_vals, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+    old_null = old_vals.isna().to_numpy()
+    new_null = new_vals.isna().to_numpy()
+    both_present = ~old_null & ~new_null
+    non_numeric = both_present & (np.isnan(old_num) | np.isnan(new_num))
+    both_present &= ~non_numeric
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        diff = np.abs(old_num - new_num)
+        magnitude = np.maximum(np.abs(old_num), np.abs(new_num))
+        allowed = float(tolerance or 0.0)
+        if relative_tolerance:
+            allowed = np.maximum(allowed, magnitude * (float(relative_tolerance) / 100.0))
+        if ulps:
+            allowed = np.maximum(allowed, np.spacing(magnitude) * float(ulps))
+        out_of_band = diff > allowed
+
+    mismatch = (both_present & out_of_band) | _null_mismatch_mask(old_null, new_null, ignore_nulls)
+    return mismatch, non_numeric
+
+def _date_mismatch_mask(old_vals, new_vals, formats=None, granularity='day', ignore_nulls=False):
+    """
+    Columnar date comparison of two aligned Series.
+
+    Both columns are parsed once with parse_dates and truncated to the
+    granularity ('day', 'hour', 'minute' or 'second') before comparing, so
+    '09 Jul 2025' and '2025-07-09' match. Pairs where either value cannot be
+    parsed fall back to exact comparison of the raw values.
+    """
+    unit = DATE_GRANULARITIES.get(granularity)
+    if unit is None:
+        raise ValueError(f"Unknown date granularity {granularity!r}, expected one of {list(DATE_GRANULARITIES)}")
+
+    old_dates = parse_dates(old_vals, formats).astype(f'datetime64[{unit}]')
+    new_dates = parse_dates(new_vals, formats).astype(f'datetime64[{unit}]')
+
+    old_null = old_vals.isna().to_numpy()
+    new_null = new_vals.isna().to_numpy()
+    both_present = ~old_null & ~new_null
+    unparsed = both_present & (np.isnat(old_dates) | np.isnat(new_dates))
+
+    mismatch = (both_present & ~unparsed & (old_dates != new_dates)) | \
+               _null_mismatch_mask(old_null, new_null, ignore_nulls)
+    if unparsed.any():
+        logger.info("Unparseable dates in %s/%s: %d rows", old_vals.name, new_vals.name, np.count_nonzero(unparsed))
+        mismatch[unparsed] = _exact_mismatch_mask(old_vals[unparsed], new_vals[unparsed])
+    return mismatch
 
 def get_pk_values(merged_df, idx, pk_cols):
     """
@@ -421,7 +810,7 @@ def get_pk_values(merged_df, idx, pk_cols):
                 else:
                     pk_values[k] = "Unknown"
         except Exception as e:
-            print(f"Error getting PK value for {k}: {e}")
+            logger.warning("Error getting PK value for %s: %s", k, e)
             pk_values[k] = "Error"
     
     return pk_values
\ No newline at end of file
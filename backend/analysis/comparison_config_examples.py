@@ -152,7 +152,8 @@ print(f"Number of exceptions: {len(result['exceptions'])}")
 # Each exception will have:
 for exc in result['exceptions']:
     if 'change_type' in exc:
-        # This is a missing record
+        # This is a missing record, or a key repeated within one file
+        # (change_type 'duplicate_key', old/new hold the row counts)
         print(f"Record {exc['id']}: {exc['change_type']}")
     else:
         # This is a field difference
@@ -171,13 +172,22 @@ Available field types and their options:
    - If fuzzy_match not specified, exact comparison is used
 
 2. 'decimal' - Numeric comparison with tolerance
-   - tolerance: Float - maximum allowed difference
+   - tolerance: Float - maximum allowed absolute difference
+   - relative_tolerance: Float - maximum allowed difference as a percent of the larger value
+   - ulps: Integer - maximum allowed difference in units in the last place
+   - When several are given, a pair matches if it is within any of them
+   - Values that cannot be parsed as numbers are always reported as exceptions
 
 3. 'integer' - Whole number comparison
    - No additional options - exact comparison
 
 4. 'date' - Date comparison
-   - formats: List of date format strings for parsing
+   - formats: List of date format strings for parsing, tried in order
+     (values no format matches get a final ISO 8601 attempt; without
+     formats the format is inferred per value)
+   - granularity: 'day' (default), 'hour', 'minute' or 'second' - dates
+     equal when truncated to this unit match
+   - Values that cannot be parsed are compared exactly as text
 
 5. 'ignore' - Skip this field entirely
    - No additional options
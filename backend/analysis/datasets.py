@@ -0,0 +1,58 @@
+import logging
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_MAX_ENTRIES = 4
+
+class DatasetStore:
+    """
+    Normalized old/new frames of recent uploads, kept in memory under an
+    opaque handle so a pair can be compared again (e.g. with another primary
+    key) without uploading, parsing and normalizing the files again.
+
+    A handle expires ttl_seconds after it was last used. At most max_entries
+    pairs are kept; storing another one drops the least recently used. The
+    store lives in the server process, so handles are only valid on the
+    process that issued them.
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def put(self, df_old, df_new, **details):
+        """Keep a pair with details such as system_name or plan; returns its handle."""
+        handle = secrets.token_urlsafe(16)
+        with self._lock:
+            self._purge()
+            while self._entries and len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda key: self._entries[key]['expires'])
+                del self._entries[oldest]
+                logger.debug("Dropped dataset %s to make room", oldest)
+            self._entries[handle] = {'old': df_old, 'new': df_new, **details,
+                                     'expires': time.monotonic() + self.ttl_seconds}
+        return handle
+
+    def get(self, handle):
+        """The entry of a handle with its expiry renewed, or None if it is unknown or expired."""
+        with self._lock:
+            self._purge()
+            entry = self._entries.get(handle)
+            if entry is not None:
+                entry['expires'] = time.monotonic() + self.ttl_seconds
+            return entry
+
+    def describe(self, handle):
+        """JSON-safe reference to a handle for API responses."""
+        return {"id": handle, "expires_in_s": self.ttl_seconds}
+
+    def _purge(self):
+        now = time.monotonic()
+        for handle in [key for key, entry in self._entries.items() if entry['expires'] <= now]:
+            del self._entries[handle]
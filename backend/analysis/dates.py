@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+# Granularities a date field can be compared at, as the numpy unit each truncates to
+DATE_GRANULARITIES = {'day': 'D', 'hour': 'h', 'minute': 'm', 'second': 's'}
+
+# Maximum number of parsed raw strings remembered per list of formats
+DATE_CACHE_SIZE = 1_000_000
+
+_NAT = np.datetime64('NaT', 'us')
+
+# formats tuple -> Series of datetime64[us] indexed by raw string
+_parse_cache = {}
+
+def parse_dates(values, formats=None):
+    """
+    Parse a Series of raw date values into a datetime64[us] numpy array.
+
+    Each distinct raw string is parsed once: the column is factorized and only
+    strings not already in the module cache are parsed. Those are tried
+    against each format in order with a vectorized pd.to_datetime, and
+    whatever no format matched gets a final ISO 8601 attempt. With no formats
+    configured the format is inferred per value instead.
+
+    Timezone-aware values are converted to UTC. Missing or unparseable values
+    come back as NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if values.dt.tz is not None:
+            values = values.dt.tz_convert(None)
+        return values.astype('datetime64[us]').to_numpy()
+
+    # Missing values get code -1
+    codes, uniques = pd.factorize(values)
+    if not len(uniques):
+        return np.full(len(values), _NAT)
+
+    # Non-string values (e.g. datetime objects from Excel) are parsed from
+    # their str(); distinct values can share a string, so factorize again
+    text_codes, text_uniques = pd.factorize(pd.Index([str(u) for u in uniques], dtype=object))
+    parsed = _parse_uniques(pd.Index(text_uniques, dtype=object), formats)
+    result = parsed[text_codes][codes]
+    result[codes < 0] = _NAT
+    return result
+
+def _parse_uniques(uniques, formats):
+    """Parse distinct raw strings, reusing and extending the cache for these formats."""
+    key = tuple(formats or ())
+    cache = _parse_cache.get(key)
+
+    parsed = np.full(len(uniques), _NAT)
+    hits = cache.index.get_indexer(uniques) if cache is not None else np.full(len(uniques), -1)
+    found = hits >= 0
+    if found.any():
+        parsed[found] = cache.to_numpy()[hits[found]]
+
+    if not found.all():
+        misses = uniques[~found]
+        fresh = pd.Series(_parse_strings(misses, formats), index=misses)
+        parsed[~found] = fresh.to_numpy()
+
+        if cache is not None and len(cache) + len(fresh) <= DATE_CACHE_SIZE:
+            _parse_cache[key] = pd.concat([cache, fresh])
+        elif len(fresh) <= DATE_CACHE_SIZE:
+            _parse_cache[key] = fresh
+    return parsed
+
+def _parse_strings(strings, formats):
+    """Try each format in turn on the strings no earlier format could parse."""
+    attempts = [*formats, 'ISO8601'] if formats else ['mixed']
+    result = np.full(len(strings), _NAT)
+    remaining = np.arange(len(strings))
+
+    for fmt in attempts:
+        if not len(remaining):
+            break
+        attempt = pd.to_datetime(strings[remaining], format=fmt, errors='coerce', utc=True)
+        ok = attempt.notna()
+        result[remaining[ok]] = attempt[ok].tz_convert(None).as_unit('us').to_numpy()
+        remaining = remaining[~ok]
+    return result
@@ -1,8 +1,8 @@
 import pandas as pd
 from sqlalchemy import create_engine
 from typing import Dict, Any
-import xml.etree.ElementTree as ET
-from collections import Counter
+from .mapping import compile_plan
+from .xml_stream import read_xml
 
 def load_file(path: str) -> pd.DataFrame:
     """
@@ -13,48 +13,41 @@ def load_file(path: str) -> pd.DataFrame:
     elif path.endswith(('.xls', '.xlsx')):
         return pd.read_excel(path)
     elif path.endswith('.xml'):
-        try:
-            return pd.read_xml(path)
-        except Exception:
-            # Fallback for complex XML
-            tree = ET.parse(path)
-            root = tree.getroot()
-            tags = [child.tag for child in root]
-            most_common_tag = Counter(tags).most_common(1)[0][0]
-            rows = [{c.tag: c.text for c in rec} for rec in root.findall(most_common_tag)]
-            return pd.DataFrame(rows)
+        # Streamed record by record; see xml_stream
+        return read_xml(path)
     else:
         raise ValueError(f"Unsupported file type: {path}")
 
+def column_key(name: str) -> str:
+    """Lowercase, snake_case form of a column name, as mapping fields refer to it."""
+    return name.strip().lower().replace(' ', '_')
+
 def normalize(df: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame:
     """
-    Clean and standardize a DataFrame according to the mapping config:
+    Clean and standardize a DataFrame according to the mapping config
+    (a ComparisonPlan, or a config dict that is compiled first):
     - Lowercase & snake_case column names
     - Apply any explicit renames from cfg['fields'][*]['rename_to']
-    - Perform string cleaning (strip, lowercase) per cfg['fields'][*]['clean']
+    - Perform string cleaning (strip, lowercase) per cfg['fields'][*]['clean'],
+      on the column's name after renaming
     """
+    plan = compile_plan(cfg)
+
     # 1) Lowercase & snake-case all column names
-    df = df.rename(columns={
-        c: c.strip().lower().replace(' ', '_') for c in df.columns
-    })
+    df = df.rename(columns={c: column_key(c) for c in df.columns})
 
     # 2) Apply explicit renames from mapping config
-    rename_map = {
-        field: rules['rename_to']
-        for field, rules in cfg.get('fields', {}).items()
-        if 'rename_to' in rules
-    }
-    if rename_map:
-        df = df.rename(columns=rename_map)
+    if plan.renames:
+        df = df.rename(columns=dict(plan.renames))
 
     # 3) Apply string cleaning rules
-    for field, rules in cfg.get('fields', {}).items():
-        if rules.get('type') == 'string' and 'clean' in rules and field in df.columns:
-            for step in rules['clean']:
+    for field in plan.fields.values():
+        if field.clean and field.name in df.columns:
+            for step in field.clean:
                 if step == 'strip_whitespace':
-                    df[field] = df[field].astype(str).str.strip()
+                    df[field.name] = df[field.name].astype(str).str.strip()
                 elif step == 'lowercase':
-                    df[field] = df[field].astype(str).str.lower()
+                    df[field.name] = df[field.name].astype(str).str.lower()
 
     # 4) (Optional) Add date parsing or other transforms here
 
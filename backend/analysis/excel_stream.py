@@ -0,0 +1,124 @@
+import logging
+import os
+from datetime import date, datetime
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import openpyxl
+import pandas as pd
+from pandas.io.parsers import TextParser
+from .etl import column_key
+
+try:
+    import python_calamine  # Rust reader for xlsx, xls and ods
+except ImportError:
+    python_calamine = None
+
+logger = logging.getLogger(__name__)
+
+# Rows per DataFrame chunk when none is given
+DEFAULT_CHUNK_ROWS = 100_000
+
+def excel_engine(path):
+    """Reader used for a workbook: calamine when installed, else openpyxl (xlsx) or xlrd (xls)."""
+    if python_calamine is not None:
+        return 'calamine'
+    return 'xlrd' if path.lower().endswith('.xls') else 'openpyxl'
+
+def iter_excel_chunks(path, sheet=0, chunksize=DEFAULT_CHUNK_ROWS, skip_columns=()):
+    """
+    Stream one worksheet as DataFrame chunks of at most `chunksize` rows.
+
+    `sheet` is a sheet name or 0-based position. The first row is the
+    header; columns whose column_key is in `skip_columns` are dropped as
+    rows are read, and rows without any value are skipped. Cells are
+    converted the way pandas.read_excel converts them (see _convert_cell),
+    so columns get the same dtypes.
+
+    calamine and openpyxl (in read-only mode) hand over one row at a time;
+    xlrd has no streaming mode, but .xls sheets are limited to 65,536 rows.
+    """
+    rows = _iter_rows(path, sheet)
+    header = next(rows, None)
+    if header is None:
+        return
+    names = [f"Unnamed: {i}" if value is None or value == '' else str(value) for i, value in enumerate(header)]
+    keep = [i for i, name in enumerate(names) if column_key(name) not in skip_columns]
+    names = [names[i] for i in keep]
+    width = len(header)
+
+    chunk = []
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        values = [_convert_cell(row[i]) for i in keep]
+        if all(value == '' for value in values):
+            continue
+        chunk.append(values)
+        if len(chunk) >= chunksize:
+            yield _to_frame(chunk, names)
+            chunk = []
+    if chunk:
+        yield _to_frame(chunk, names)
+
+def read_excel(path, sheets=(0,), skip_columns=()):
+    """
+    Worksheets as one DataFrame, their rows stacked in the order of `sheets`.
+    Several sheets are read concurrently, one worker process per sheet (up
+    to the CPU count), since the readers hold the GIL while parsing.
+    """
+    if len(sheets) == 1:
+        return _read_sheet(path, sheets[0], skip_columns)
+    workers = min(len(sheets), os.cpu_count() or 1)
+    logger.debug("Reading %d sheets of %s with %d workers", len(sheets), path, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(_read_sheet, repeat(path), sheets, repeat(skip_columns)))
+    return pd.concat(frames, ignore_index=True)
+
+def _read_sheet(path, sheet, skip_columns):
+    chunks = list(iter_excel_chunks(path, sheet, skip_columns=skip_columns))
+    if not chunks:
+        return pd.DataFrame()
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+def _iter_rows(path, sheet):
+    """Cell values of a worksheet, row by row."""
+    engine = excel_engine(path)
+    if engine == 'calamine':
+        workbook = python_calamine.CalamineWorkbook.from_path(path)
+        try:
+            if isinstance(sheet, str):
+                worksheet = workbook.get_sheet_by_name(sheet)
+            else:
+                worksheet = workbook.get_sheet_by_index(sheet)
+            yield from worksheet.iter_rows()
+        finally:
+            workbook.close()
+    elif engine == 'openpyxl':
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+        try:
+            worksheet = workbook[sheet] if isinstance(sheet, str) else workbook.worksheets[sheet]
+            yield from worksheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    else:
+        df = pd.read_excel(path, sheet_name=sheet, engine='xlrd', header=None)
+        yield from df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+def _convert_cell(value):
+    """
+    A cell value as pandas' Excel readers hand it to the parser: empty cells
+    as '', whole-number floats as int (Excel stores every number as a
+    float) and dates as datetimes, which the parser reads as datetime64.
+    """
+    kind = type(value)
+    if kind is float:
+        return int(value) if value.is_integer() else value
+    if value is None:
+        return ''
+    if kind is date:
+        return datetime(value.year, value.month, value.day)
+    return value
+
+def _to_frame(rows, names):
+    with TextParser(rows, names=names) as parser:
+        return parser.read()
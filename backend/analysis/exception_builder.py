@@ -1,19 +1,38 @@
+import logging
+import numpy as np
 import pandas as pd
 from dateutil import parser
+from .dates import parse_dates
+from .exception_table import ExceptionTable
+from .mapping import compile_plan
+
+logger = logging.getLogger(__name__)
 
 def add_summary_to_exceptions(exceptions, config=None):
     """
     Add summary column to existing exception records.
     
     Args:
-        exceptions (list): List of exception dictionaries
+        exceptions (ExceptionTable or list): Exceptions from run_compare
         config (dict): Optional configuration for field types
     
     Returns:
-        list: Exception records with summary column added
+        The same exceptions with a summary column added
     """
     if not exceptions:
         return exceptions
+
+    if isinstance(exceptions, ExceptionTable):
+        plan = compile_plan(config)
+        frame = exceptions.frame
+        summaries = pd.Series(None, index=frame.index, dtype=object)
+        for field_name, rows in frame.groupby('field', sort=False).groups.items():
+            field = plan.field(field_name)
+            summaries.loc[rows] = build_summaries(
+                frame.loc[rows, 'old'], frame.loc[rows, 'new'], field.type, field.formats
+            )
+        frame['summary'] = summaries
+        return exceptions
     
     # Add summary to each exception
     for exc in exceptions:
@@ -60,9 +79,87 @@ def build_summary(old_value, new_value, field_type=None):
             return _build_text_summary(o, n)
             
     except Exception as e:
-        print(f"Error building summary: {e}")
+        logger.warning("Error building summary: %s", e)
         return f"from {old_value} to {new_value}"
 
+def build_summaries(old_values, new_values, field_type=None, formats=None):
+    """
+    Columnar build_summary over two aligned Series of old and new values.
+    Produces the same text as calling build_summary on every pair, except
+    that dates are parsed with the field's configured formats when given.
+    """
+    try:
+        old_null = old_values.isna()
+        new_null = new_values.isna()
+        present = ~old_null & ~new_null
+
+        summaries = pd.Series(None, index=old_values.index, dtype=object)
+        summaries[old_null & new_null] = "no change"
+        summaries[old_null & ~new_null] = "added: " + new_values[old_null & ~new_null].map(str)
+        summaries[~old_null & new_null] = "removed: " + old_values[~old_null & new_null].map(str)
+
+        if present.any():
+            old_present, new_present = old_values[present], new_values[present]
+            if field_type in ("numeric", "integer", "decimal"):
+                summaries[present] = _build_numeric_summaries(old_present, new_present)
+            elif field_type == "date":
+                summaries[present] = _build_date_summaries(old_present, new_present, formats)
+            else:
+                summaries[present] = _build_text_summaries(old_present, new_present)
+        return summaries
+
+    except Exception as e:
+        logger.warning("Error building summaries in bulk, falling back to per-row: %s", e)
+        return pd.Series(
+            [build_summary(o, n, field_type) for o, n in zip(old_values, new_values)],
+            index=old_values.index, dtype=object
+        )
+
+def _build_numeric_summaries(old_values, new_values):
+    """Columnar _build_numeric_summary."""
+    old_num = pd.to_numeric(old_values, errors='coerce').to_numpy(dtype='float64', na_value=float('nan'))
+    new_num = pd.to_numeric(new_values, errors='coerce').to_numpy(dtype='float64', na_value=float('nan'))
+    summaries = []
+    for o, n, old_v, new_v in zip(old_values, new_values, old_num, new_num):
+        if old_v != old_v or new_v != new_v:  # not numeric
+            summaries.append(f"from {o} to {n}")
+        elif old_v != 0:
+            delta = new_v - old_v
+            summaries.append(f"changed by {delta:+.2f} ({delta / old_v * 100:+.2f}%)")
+        else:
+            summaries.append(f"changed by {new_v - old_v:+.2f}")
+    return summaries
+
+def _build_date_summaries(old_values, new_values, formats=None):
+    """Columnar _build_date_summary; values parse_dates cannot read fall back to dateutil."""
+    old_dates = parse_dates(old_values, formats)
+    new_dates = parse_dates(new_values, formats)
+    parsed = ~np.isnat(old_dates) & ~np.isnat(new_dates)
+    # Whole days, rounded towards negative infinity like timedelta.days
+    days = np.zeros(len(old_dates), dtype=np.int64)
+    days[parsed] = (new_dates[parsed] - old_dates[parsed]) // np.timedelta64(1, 'D')
+
+    summaries = []
+    for o, n, ok, d in zip(old_values, new_values, parsed, days):
+        if not ok:
+            summaries.append(_build_date_summary(o, n))
+        elif d == 0:
+            summaries.append("same date, time changed")
+        elif d in (1, -1):
+            summaries.append(f"shifted by {d} day")
+        else:
+            summaries.append(f"shifted by {d:+d} days")
+    return summaries
+
+def _build_text_summaries(old_values, new_values, max_length=30):
+    """Columnar _build_text_summary."""
+    def display(values):
+        text = values.map(str).astype(object)
+        too_long = text.str.len() > max_length
+        return text.where(~too_long, text.str[:max_length] + "...")
+
+    return ("from '" + display(old_values) + "' to '" + display(new_values) + "'").to_numpy(dtype=object)
+
 def _build_numeric_summary(old_value, new_value):
     """Build summary for numeric fields with delta and percentage."""
     try:
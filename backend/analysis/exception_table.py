@@ -0,0 +1,70 @@
+import pandas as pd
+
+# Columns that follow the primary key column(s) in every exception row
+EXCEPTION_COLUMNS = ['field', 'old', 'new', 'change_type']
+
+# Order of record-level exceptions ahead of field exceptions in a result
+CHANGE_TYPE_ORDER = {'duplicate_key': 0, 'deleted_record': 1, 'added_record': 2}
+
+class ExceptionTable:
+    """
+    Columnar set of reconciliation exceptions.
+
+    Backed by one DataFrame with the primary key column(s) followed by field,
+    old, new and change_type (null for plain field differences), plus summary
+    once add_summary_to_exceptions has run. Pipeline stages work on .frame in
+    bulk. Iterating, indexing or to_dicts() give the list-of-dicts view used
+    before the table existed.
+    """
+
+    def __init__(self, frame=None, pk_cols=()):
+        self.pk_cols = list(pk_cols)
+        if frame is None:
+            frame = pd.DataFrame({col: pd.Series(dtype=object) for col in [*self.pk_cols, *EXCEPTION_COLUMNS]})
+        self.frame = frame
+
+    @classmethod
+    def from_records(cls, records, pk_cols, field, old, new, change_type=None):
+        """
+        Build exceptions for the rows of `records` (a DataFrame holding the
+        primary key columns). old/new are Series aligned with `records` or
+        scalars repeated on every row.
+        """
+        frame = records[list(pk_cols)].reset_index(drop=True)
+        for name, values in (('field', field), ('old', old), ('new', new), ('change_type', change_type)):
+            if isinstance(values, pd.Series):
+                values = values.to_numpy(dtype=object)
+            frame[name] = values
+            frame[name] = frame[name].astype(object)
+        return cls(frame, pk_cols)
+
+    @classmethod
+    def concat(cls, tables, pk_cols=None):
+        """Stack several tables into one, keeping their order."""
+        tables = list(tables)
+        if pk_cols is None:
+            pk_cols = tables[0].pk_cols if tables else []
+        frames = [t.frame for t in tables if len(t)]
+        if not frames:
+            return cls(None, pk_cols)
+        return cls(pd.concat(frames, ignore_index=True), pk_cols)
+
+    def to_dicts(self):
+        """List-of-dicts view; change_type is only present on record-level exceptions."""
+        records = self.frame.to_dict('records')
+        for record in records:
+            if 'change_type' in record and pd.isna(record['change_type']):
+                del record['change_type']
+        return records
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __bool__(self):
+        return len(self.frame) > 0
+
+    def __iter__(self):
+        return iter(self.to_dicts())
+
+    def __getitem__(self, i):
+        return self.to_dicts()[i]
@@ -0,0 +1,197 @@
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# How peak memory is measured per stage:
+# - tracemalloc: peak Python/numpy allocations above what was allocated when
+#                the stage started (most precise, but slows allocation-heavy
+#                code several times over, in every thread of the process)
+# - rss: peak resident set size above the one when the stage started (the
+#        default; next to no overhead). The kernel's high-water mark (VmHWM)
+#        is reset at each stage boundary, which Linux alone allows; elsewhere
+#        stages get no memory figure
+# - off: no memory figures
+MEMORY_MODES = ('tracemalloc', 'rss', 'off')
+
+# Writing 5 here resets the process's VmHWM to its current RSS (Linux 4.0+)
+_CLEAR_REFS = '/proc/self/clear_refs'
+_RSS_PEAK_RESETTABLE = os.access(_CLEAR_REFS, os.W_OK)
+
+# Structured fields passed as `extra=` on log calls; StructuredFormatter
+# appends the ones a record carries as key=value pairs
+LOG_FIELDS = ('system_name', 'analysis_id', 'stage', 'rows', 'duration_ms')
+
+# Recorder the stage() calls of the current request report to
+_active = ContextVar('stage_timings', default=None)
+
+_MB = 1024 * 1024
+
+# tracemalloc is process-wide: it runs while any recorder that asked for it
+# is active, so concurrent requests do not stop it under each other
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+logger = logging.getLogger(__name__)
+
+class StageTimings:
+    """
+    Wall time, CPU time and peak memory per named stage of one reconciliation.
+
+    Activate it around a request and wrap the work in stage(name) blocks;
+    stages that run several times (one per chunk or partition) are added up.
+    CPU time is for this process only, so it does not include worker
+    processes of a parallel comparison. Memory figures are process-wide too:
+    under concurrent requests they include the other requests' allocations,
+    and each request's stages reset the peak the others are measuring.
+    """
+
+    def __init__(self, memory='rss'):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"Unknown memory mode: {memory}. Allowed modes are: {', '.join(MEMORY_MODES)}")
+        self.memory = memory
+        self.stages = {}
+        self.started = None
+        # Peak traced memory seen by each open stage while a nested stage ran
+        self._open_peaks = []
+
+    @contextmanager
+    def activate(self):
+        """Make this the recorder for stage() calls until the block exits."""
+        global _tracing_users, _tracing_started
+        traced = self.memory == 'tracemalloc'
+        if traced:
+            with _tracing_lock:
+                if not _tracing_users and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _tracing_started = True
+                _tracing_users += 1
+        token = _active.set(self)
+        self.started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+            if traced:
+                with _tracing_lock:
+                    _tracing_users -= 1
+                    if not _tracing_users and _tracing_started:
+                        tracemalloc.stop()
+                        _tracing_started = False
+
+    @contextmanager
+    def stage(self, name):
+        """Time the block and add it to the figures recorded under name."""
+        memory = self._read_memory()
+        tracing = memory is not None
+        if tracing:
+            current, peak = memory
+            if self._open_peaks:
+                self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+            self._reset_peak()
+            self._open_peaks.append(current)
+            start_memory = current
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+
+            peak_mb = None
+            if tracing:
+                memory = self._read_memory()
+                peak = max(memory[1] if memory else 0, self._open_peaks.pop())
+                if self._open_peaks:
+                    self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+                self._reset_peak()
+                peak_mb = max(peak - start_memory, 0) / _MB
+
+            entry = self.stages.setdefault(name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_memory_mb": None})
+            entry["calls"] += 1
+            entry["wall_ms"] += 1000 * wall
+            entry["cpu_ms"] += 1000 * cpu
+            if peak_mb is not None:
+                entry["peak_memory_mb"] = max(entry["peak_memory_mb"] or 0.0, peak_mb)
+            logger.debug("Stage %s took %.2f ms", name, 1000 * wall,
+                         extra={"stage": name, "duration_ms": round(1000 * wall, 2)})
+
+    def _read_memory(self):
+        """(current, peak since the last reset) in bytes for the memory mode, or None without figures."""
+        if self.memory == 'tracemalloc':
+            return tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+        if self.memory == 'rss' and _RSS_PEAK_RESETTABLE:
+            return _rss()
+        return None
+
+    def _reset_peak(self):
+        if self.memory == 'tracemalloc':
+            tracemalloc.reset_peak()
+        else:
+            _reset_peak_rss()
+
+    def elapsed_ms(self):
+        """Wall time since activate() in milliseconds."""
+        return round(1000 * (time.perf_counter() - self.started), 2) if self.started is not None else None
+
+    def to_list(self):
+        """Recorded stages in the order they first ran, rounded for reporting."""
+        return [
+            {
+                "stage": name,
+                "calls": entry["calls"],
+                "wall_ms": round(entry["wall_ms"], 2),
+                "cpu_ms": round(entry["cpu_ms"], 2),
+                "peak_memory_mb": None if entry["peak_memory_mb"] is None else round(entry["peak_memory_mb"], 2),
+            }
+            for name, entry in self.stages.items()
+        ]
+
+@contextmanager
+def stage(name):
+    """
+    Record the block as stage `name` on the active StageTimings, if any.
+    Without an active recorder (tests, worker processes) this does nothing.
+    """
+    timings = _active.get()
+    if timings is None:
+        yield
+        return
+    with timings.stage(name):
+        yield
+
+class StructuredFormatter(logging.Formatter):
+    """Standard log line followed by the LOG_FIELDS the record carries, as key=value."""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = " ".join(f"{key}={getattr(record, key)}" for key in LOG_FIELDS if hasattr(record, key))
+        return f"{line} {fields}" if fields else line
+
+def configure_logging(level='INFO'):
+    """Send log records to stderr with StructuredFormatter at the given level."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+def _rss():
+    """(current, peak) resident set size of this process in bytes, from /proc/self/status."""
+    sizes = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                key, value = line.split(':', 1)
+                sizes[key] = int(value.split()[0]) * 1024
+    return sizes.get('VmRSS', 0), sizes.get('VmHWM', 0)
+
+def _reset_peak_rss():
+    """Reset the process's peak resident set size to the current one."""
+    with open(_CLEAR_REFS, 'w') as f:
+        f.write('5')
@@ -1,6 +1,82 @@
+import copy
+import hashlib
 import pandas as pd
 import yaml
-from typing import Dict, Any, List
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
+
+# Decimal fields are compared numerically once any of these is set
+DECIMAL_TOLERANCE_KEYS = ('tolerance', 'relative_tolerance', 'ulps')
+
+# Column dtype readers use per field type. Dates stay text: the date
+# comparator parses them with the field's formats. 'str' is the pyarrow-backed
+# string dtype on pandas >= 3 only; pandas 2 reads such columns as object
+FIELD_DTYPES = {'decimal': 'float64', 'integer': 'Int64', 'string': 'str', 'date': 'str'}
+
+# How rows that share a primary key value are reconciled (duplicate_keys setting)
+DUPLICATE_KEY_POLICIES = ('reject', 'keep_first', 'keep_last', 'pair')
+
+# Compiled plans by SHA-256 of the mapping file contents
+_plan_cache: Dict[str, 'ComparisonPlan'] = {}
+
+@dataclass(frozen=True)
+class FieldPlan:
+    """
+    Compiled rules for one column, under its name after renames.
+    comparator is one of 'exact', 'fuzzy', 'decimal' or 'date'.
+    """
+    name: str
+    source: Optional[str] = None
+    type: Optional[str] = None
+    comparator: str = 'exact'
+    clean: Tuple[str, ...] = ()
+    dtype: Optional[str] = None
+    fuzzy_match: Optional[float] = None
+    tolerance: Optional[float] = None
+    relative_tolerance: Optional[float] = None
+    ulps: Optional[float] = None
+    formats: Tuple[str, ...] = ()
+    granularity: str = 'day'
+
+@dataclass(frozen=True, eq=False)
+class ComparisonPlan(Mapping):
+    """
+    Immutable, pre-interpreted form of a mapping config shared by
+    etl.normalize and compare.run_compare.
+
+    Lookups such as plan['mode'] or plan.get('pair_name') read the original
+    settings, so code written against the config dict keeps working.
+    """
+    settings: Mapping
+    pk: Tuple[str, ...]
+    fields: Mapping
+    renames: Mapping
+    ignored: frozenset
+    ignore_nulls: bool
+    include_missing_records: bool
+    parallel_workers: int
+    duplicate_keys: str
+    summary_only: bool
+    digest: Optional[str] = None
+
+    def field(self, name: str) -> FieldPlan:
+        """Rules for a column; columns without any get exact comparison."""
+        return self.fields.get(name) or FieldPlan(name=name, source=name)
+
+    def with_settings(self, **overrides) -> 'ComparisonPlan':
+        """A new plan with some top-level settings replaced."""
+        return compile_plan({**_thaw(self.settings), **overrides})
+
+    def __getitem__(self, key):
+        return self.settings[key]
+
+    def __iter__(self):
+        return iter(self.settings)
+
+    def __len__(self):
+        return len(self.settings)
 
 def detect_primary_key(df_old: pd.DataFrame, df_new: pd.DataFrame) -> List[str]:
     """
@@ -24,13 +100,118 @@ def detect_primary_key(df_old: pd.DataFrame, df_new: pd.DataFrame) -> List[str]:
     # Return top two candidates for a composite key
     return sorted_cols[:2]
 
-def load_mapping(path: str) -> Dict[str, Any]:
+def rank_key_candidates(df_old: pd.DataFrame, df_new: pd.DataFrame) -> List[str]:
+    """
+    Columns present in both datasets that could serve as a single-column
+    primary key, best first: only columns unique in both qualify, those
+    without nulls rank above those with nulls, and ties keep the old
+    dataset's column order (so the first is what detect_primary_key picks
+    when it has no nulls).
+    """
+    common_cols = [col for col in df_old.columns if col in df_new.columns]
+    unique_cols = [
+        col for col in common_cols
+        if df_old[col].is_unique and df_new[col].is_unique
+    ]
+    return sorted(unique_cols, key=lambda col: bool(df_old[col].hasnans or df_new[col].hasnans))
+
+def load_mapping(path: str) -> ComparisonPlan:
+    """
+    Load the reconciliation mapping config from a YAML file and compile it.
+    Returns a ComparisonPlan; its settings hold pair_name (str), pk (List[str])
+    and fields (dict). Plans are cached by file content, so loading an
+    unchanged file again returns the same plan without re-reading the YAML.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if digest not in _plan_cache:
+        _plan_cache[digest] = compile_plan(_parse_mapping(content), digest)
+    return _plan_cache[digest]
+
+def compile_plan(cfg: Optional[Dict[str, Any]], digest: Optional[str] = None) -> ComparisonPlan:
     """
-    Load the reconciliation mapping config from a YAML file.
-    Returns a dict with keys: pair_name (str), pk (List[str]), fields (dict).
+    Interpret a mapping config dict once: resolve renamed column names, pick
+    a comparator per field, collect cleaning steps, dtype hints and ignored
+    columns. A ComparisonPlan is returned unchanged.
     """
-    with open(path, 'r') as f:
-        cfg = yaml.safe_load(f)
+    if isinstance(cfg, ComparisonPlan):
+        return cfg
+    cfg = copy.deepcopy(cfg or {})
+
+    fields, renames, ignored = {}, {}, set()
+    for source, rules in (cfg.get('fields') or {}).items():
+        field = _compile_field(source, rules or {})
+        fields[field.name] = field
+        if field.name != source:
+            renames[source] = field.name
+        if field.type == 'ignore':
+            ignored.add(field.name)
+
+    duplicate_keys = cfg.get('duplicate_keys', 'pair')
+    if duplicate_keys not in DUPLICATE_KEY_POLICIES:
+        raise ValueError(f"Unknown duplicate_keys policy {duplicate_keys!r}, expected one of {list(DUPLICATE_KEY_POLICIES)}")
+
+    return ComparisonPlan(
+        settings=_freeze(cfg),
+        pk=tuple(cfg.get('pk') or ()),
+        fields=MappingProxyType(fields),
+        renames=MappingProxyType(renames),
+        ignored=frozenset(ignored),
+        ignore_nulls=bool(cfg.get('ignore_nulls', False)),
+        include_missing_records=bool(cfg.get('include_missing_records', False)),
+        parallel_workers=int(cfg.get('parallel_workers') or 1),
+        duplicate_keys=duplicate_keys,
+        summary_only=bool(cfg.get('summary_only', False)),
+        digest=digest,
+    )
+
+def _compile_field(source: str, rules: Dict[str, Any]) -> FieldPlan:
+    field_type = rules.get('type')
+    comparator = 'exact'
+    if field_type == 'string' and 'fuzzy_match' in rules:
+        comparator = 'fuzzy'
+    elif field_type == 'decimal' and any(k in rules for k in DECIMAL_TOLERANCE_KEYS):
+        comparator = 'decimal'
+    elif field_type == 'date':
+        comparator = 'date'
+
+    clean = tuple(rules.get('clean') or ()) if field_type == 'string' else ()
+    dtype = FIELD_DTYPES.get(field_type)
+
+    return FieldPlan(
+        name=rules.get('rename_to', source),
+        source=source,
+        type=field_type,
+        comparator=comparator,
+        clean=clean,
+        dtype=dtype,
+        fuzzy_match=rules.get('fuzzy_match'),
+        tolerance=rules.get('tolerance'),
+        relative_tolerance=rules.get('relative_tolerance'),
+        ulps=rules.get('ulps'),
+        formats=tuple(rules.get('formats') or ()),
+        granularity=rules.get('granularity', 'day'),
+    )
+
+def _freeze(value):
+    """Read-only copy of a parsed YAML value."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+def _parse_mapping(content: bytes) -> Dict[str, Any]:
+    """Parse and normalize the YAML text of a mapping file."""
+    cfg = yaml.safe_load(content) or {}
     # Normalize the pair name
     if 'pair_name' in cfg:
         cfg['pair_name'] = str(cfg['pair_name']).strip().lower()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+def compare_columns_parallel(both_records, columns, plan, ignore_nulls, workers):
+    """
+    Compare several columns of a merged frame across a process pool.
+
+    Each column's aligned old/new arrays are written once into shared memory
+    and workers attach to them instead of receiving pickled copies. Numeric
+    columns are shared as-is; everything else is factorized first so only the
+    int64 codes go through shared memory and just the distinct values are
+    pickled. Workers write their mismatch mask into a shared output buffer.
+
+    Returns a dict of column -> boolean mask, keyed in the order of `columns`
+    so results merge deterministically regardless of completion order.
+    """
+    blocks = []
+    try:
+        tasks = []
+        for col in columns:
+            old_spec = _share_series(both_records[f"{col}_old"], blocks)
+            new_spec = _share_series(both_records[f"{col}_new"], blocks)
+            out_spec = _alloc_shared(len(both_records), np.bool_, blocks)
+            tasks.append((col, old_spec, new_spec, out_spec, plan.field(col), ignore_nulls))
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # list() waits for every column and re-raises the first worker failure
+            list(pool.map(_compare_worker, tasks))
+
+        masks = {}
+        for col, _, _, out_spec, _, _ in tasks:
+            shm, arr = _attach(out_spec)
+            masks[col] = arr.copy()
+            del arr
+            shm.close()
+        return masks
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+def _share_series(series, blocks):
+    """
+    Describe a Series as shared-memory buffers plus a small picklable header.
+    """
+    values = series.to_numpy()
+    if values.dtype.kind in 'biufcmM':
+        return {
+            'name': series.name,
+            'data': _copy_to_shared(values, blocks),
+            'uniques': None,
+        }
+    codes, uniques = pd.factorize(series)
+    return {
+        'name': series.name,
+        'data': _copy_to_shared(codes.astype(np.int64, copy=False), blocks),
+        'uniques': np.asarray(uniques, dtype=object),
+    }
+
+def _alloc_shared(length, dtype, blocks):
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(length * dtype.itemsize, 1))
+    blocks.append(shm)
+    np.ndarray(length, dtype=dtype, buffer=shm.buf)[:] = 0
+    return {'shm': shm.name, 'length': length, 'dtype': dtype.str}
+
+def _copy_to_shared(values, blocks):
+    spec = _alloc_shared(len(values), values.dtype, blocks)
+    shm, arr = _attach(spec)
+    arr[:] = values
+    del arr
+    shm.close()
+    return spec
+
+def _attach(spec):
+    shm = shared_memory.SharedMemory(name=spec['shm'])
+    arr = np.ndarray(spec['length'], dtype=np.dtype(spec['dtype']), buffer=shm.buf)
+    return shm, arr
+
+def _load_series(spec, handles):
+    """Rebuild a Series from its shared-memory description."""
+    shm, data = _attach(spec['data'])
+    handles.append(shm)
+    if spec['uniques'] is None:
+        return pd.Series(data, name=spec['name'], copy=False)
+    values = pd.api.extensions.take(spec['uniques'], data, allow_fill=True, fill_value=None)
+    return pd.Series(values, name=spec['name'], dtype=object)
+
+def _compare_worker(task):
+    """Process-pool entry point: compare one column and write its mask."""
+    from .compare import _column_mismatch_mask
+
+    col, old_spec, new_spec, out_spec, field, ignore_nulls = task
+    handles = []
+    try:
+        old_vals = _load_series(old_spec, handles)
+        new_vals = _load_series(new_spec, handles)
+        mask = _column_mismatch_mask(old_vals, new_vals, field, ignore_nulls)
+
+        shm, out = _attach(out_spec)
+        handles.append(shm)
+        out[:] = mask
+        del out, old_vals, new_vals
+    finally:
+        for shm in handles:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # a view is still alive; the parent unlinks the block anyway
+    return col
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when parsing or normalization changes what a cached frame holds, so
+# entries written by older code are no longer found
+CACHE_VERSION = 1
+
+# Mapping settings that change how an upload is parsed and normalized.
+# Comparison-only settings (mode, ignore_nulls, ...) are left out, so
+# changing them still hits the cache
+PLAN_KEYS = ('pk', 'fields', 'sheet')
+
+_HASH_BLOCK_BYTES = 1 << 20
+_MB = 1024 * 1024
+
+class ParseCache:
+    """
+    Parsed and normalized uploads stored as Parquet files in `directory`,
+    keyed by the file's content, its type and the mapping settings that
+    shape parsing. A hit is read back memory-mapped instead of parsing the
+    upload again, so re-running a pair with another primary key or
+    comparison setting skips parsing and normalization.
+
+    The least recently used entries are removed once the directory holds
+    more than max_mb. The cache needs pyarrow for Parquet and is disabled
+    without it, or when max_mb is 0. Entries are written to a temporary file
+    and renamed into place, so concurrent requests and processes can share a
+    directory.
+    """
+
+    def __init__(self, directory, max_mb):
+        self.directory = directory
+        self.max_bytes = int(float(max_mb) * _MB)
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return pyarrow is not None and self.max_bytes > 0
+
+    def key(self, file_path, filename, plan):
+        """Cache key of an upload: its content hash, file type and the PLAN_KEYS settings of the plan."""
+        settings = json.dumps({name: plan.get(name) for name in PLAN_KEYS}, sort_keys=True, default=_plain)
+        extension = filename.rsplit('.', 1)[-1].lower()
+        text = f"{CACHE_VERSION}:{extension}:{file_digest(file_path)}:{settings}"
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key):
+        """The cached DataFrame for key, or None."""
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path, engine='pyarrow', memory_map=True)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Dropping unreadable cache entry %s: %s", path, e)
+            _remove(path)
+            return None
+        try:
+            # Mark as most recently used
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by another request meanwhile
+        return df
+
+    def put(self, key, df):
+        """Store df under key and evict old entries; returns False if df cannot be stored as Parquet."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp_path, engine='pyarrow', index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            # e.g. object columns mixing numbers and text
+            logger.info("Not caching parsed upload: %s", e)
+            _remove(tmp_path)
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.parquet'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                _remove(path)
+                total -= size
+                logger.debug("Evicted cache entry %s", path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.parquet")
+
+def file_digest(file_path):
+    """SHA-256 of a file's content, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _plain(value):
+    """JSON form of the read-only mappings in a compiled plan's settings."""
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    raise TypeError(f"Cannot hash setting of type {type(value).__name__}")
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
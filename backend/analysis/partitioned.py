@@ -0,0 +1,142 @@
+import logging
+import math
+import os
+import pickle
+import re
+import tempfile
+import zipfile
+import numpy as np
+import pandas as pd
+from .compare import run_compare, combine_results
+from .xml_stream import detect_record_tag, local_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+# Rough in-memory bytes per on-disk byte once a CSV is parsed into pandas
+MEMORY_EXPANSION = 4
+
+# In-memory bytes per on-disk byte while one partition is reconciled: both
+# inputs, the merged frame and its both/old-only/new-only slices
+PARTITION_OVERHEAD = 4 * MEMORY_EXPANSION
+
+# Row limit of a worksheet in the legacy .xls format
+XLS_MAX_ROWS = 65_536
+
+def plan_partitions(total_bytes, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Number of hash partitions needed so that reconciling one partition stays
+    within the memory budget, given the combined on-disk size of both inputs.
+    """
+    budget = max(int(memory_budget_mb), 1) * 1024 * 1024
+    return max(1, math.ceil(total_bytes * PARTITION_OVERHEAD / budget))
+
+def chunk_rows_for_budget(file_path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, sample_bytes=1 << 20):
+    """
+    Rows to read per chunk so a parsed chunk uses about a quarter of the
+    memory budget. Row width is estimated from the first MB of the file
+    (of the first worksheet's XML for xlsx files).
+    """
+    if file_path.lower().endswith('.xls'):
+        # Sheets of the legacy format hold at most 65,536 rows: one chunk
+        return XLS_MAX_ROWS
+    if file_path.lower().endswith('.xlsx'):
+        with zipfile.ZipFile(file_path) as workbook:
+            sheets = sorted(name for name in workbook.namelist() if name.startswith('xl/worksheets/sheet'))
+            with workbook.open(sheets[0]) as f:
+                sample = f.read(sample_bytes)
+        rows = sample.count(b'<row ') or sample.count(b'<row>')
+        return _rows_for_budget(len(sample) / max(rows, 1), memory_budget_mb)
+
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    if file_path.lower().endswith('.xml'):
+        # An XML record spans several lines; count record start tags instead
+        tag = re.escape(local_name(detect_record_tag(file_path)).encode())
+        rows = len(re.findall(rb'<(?:[\w.-]+:)?' + tag + rb'[\s/>]', sample))
+    else:
+        rows = sample.count(b'\n')
+    return _rows_for_budget(len(sample) / max(rows, 1), memory_budget_mb)
+
+def _rows_for_budget(bytes_per_row, memory_budget_mb):
+    budget = max(int(memory_budget_mb), 1) * 1024 * 1024
+    return max(1000, int(budget / 4 / (max(bytes_per_row, 1) * MEMORY_EXPANSION)))
+
+def run_partitioned_compare(old_chunks, new_chunks, pk_cols, cfg=None, num_partitions=8, spill_dir=None):
+    """
+    Reconcile inputs that do not fit in memory.
+
+    Both inputs are consumed as iterables of already-normalized DataFrame
+    chunks. Rows are hash-partitioned on the primary key into on-disk spill
+    files, so every key lands in the same partition on both sides. Each
+    partition is then reconciled with run_compare on its own and the results
+    are combined, which gives the same match_pct and exceptions as a single
+    in-memory run while only one partition is held in memory at a time.
+    """
+    with tempfile.TemporaryDirectory(prefix='recon_spill_', dir=spill_dir) as tmp_dir:
+        old_prefix = os.path.join(tmp_dir, 'old')
+        new_prefix = os.path.join(tmp_dir, 'new')
+        old_schema = _spill(old_chunks, pk_cols, num_partitions, old_prefix)
+        new_schema = _spill(new_chunks, pk_cols, num_partitions, new_prefix)
+        logger.debug("Spilled both inputs into %d partitions", num_partitions)
+
+        results = []
+        for part in range(num_partitions):
+            df_old = _load_partition(old_prefix, part, old_schema)
+            df_new = _load_partition(new_prefix, part, new_schema)
+            if df_old.empty and df_new.empty:
+                continue
+            results.append(run_compare(df_old, df_new, pk_cols, cfg))
+            del df_old, df_new
+
+    return combine_results(results)
+
+def partition_ids(df, pk_cols, num_partitions):
+    """Partition number for every row, from a 64-bit hash of its primary key."""
+    return (key_hashes(df, pk_cols) % np.uint64(num_partitions)).astype(np.int64)
+
+def key_hashes(df, pk_cols):
+    """
+    64-bit hash of every row's primary key, equal for equal keys in any chunk
+    or file. Numeric keys are hashed as float64 so that a key parsed as int in
+    one file and float in the other still gets the same hash.
+    """
+    keys = {}
+    for k in pk_cols:
+        col = df[k]
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            col = col.astype('float64')
+        keys[k] = col
+    return pd.util.hash_pandas_object(pd.DataFrame(keys), index=False).to_numpy()
+
+def _spill(chunks, pk_cols, num_partitions, prefix):
+    """
+    Append each chunk's rows to per-partition pickle files.
+    Returns an empty frame with the input's columns and dtypes.
+    """
+    schema = None
+    for chunk in chunks:
+        if schema is None:
+            schema = chunk.iloc[0:0]
+        parts = partition_ids(chunk, pk_cols, num_partitions)
+        for part, frame in chunk.groupby(parts, sort=False):
+            with open(f"{prefix}_{part}.pkl", 'ab') as f:
+                pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+    if schema is None:
+        raise ValueError("Input file contains no rows")
+    return schema
+
+def _load_partition(prefix, part, schema):
+    """Read back every frame spilled for one partition."""
+    path = f"{prefix}_{part}.pkl"
+    if not os.path.exists(path):
+        return schema
+    frames = []
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                frames.append(pickle.load(f))
+            except EOFError:
+                break
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,169 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Functions listed in a profile's top_functions
+DEFAULT_TOP_N = 30
+
+# Seconds between stack samples of the profiled thread
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+PROFILE_FORMATS = ('collapsed', 'speedscope')
+
+# cProfile cannot profile two runs at once on every Python version, so only
+# one reconciliation is profiled at a time
+_profile_lock = threading.Lock()
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profiled run is requested while another one is in progress."""
+
+class PipelineProfiler:
+    """
+    Profiles the calling thread with cProfile and a stack sampler at once.
+
+    cProfile gives exact call counts and per-function time for top_functions.
+    The sampler records the thread's stack every sample_interval seconds,
+    which gives the collapsed stacks (or speedscope profile) for a flame
+    graph. Work done in worker processes is not included.
+
+        with PipelineProfiler() as profiler:
+            ...
+            profiler.stop()    # optional, to report from inside the block
+            report = profiler.report()
+
+    Stacks start at the function that entered the profiler.
+    """
+
+    def __init__(self, top_n=DEFAULT_TOP_N, sample_interval=DEFAULT_SAMPLE_INTERVAL, fmt='collapsed'):
+        if fmt not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format: {fmt}. Allowed formats are: {', '.join(PROFILE_FORMATS)}")
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.fmt = fmt
+        self.stacks = Counter()
+        self.duration = 0.0
+        self._profile = cProfile.Profile()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._running = False
+        self._root_depth = 0
+
+    def __enter__(self):
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("Another profiled run is in progress")
+        self._thread_id = threading.get_ident()
+        # Frames above the caller are the same in every sample; leave them out
+        frame = sys._getframe(1).f_back
+        while frame is not None:
+            self._root_depth += 1
+            frame = frame.f_back
+        self._running = True
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._started = time.perf_counter()
+        self._sampler.start()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stop(self):
+        """Stop profiling; later calls do nothing."""
+        if not self._running:
+            return
+        self._running = False
+        self._profile.disable()
+        self.duration = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+        _profile_lock.release()
+
+    def _sample(self):
+        """Record the profiled thread's stack, root first, until stopped."""
+        while not self._stop.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack = stack[:len(stack) - self._root_depth]
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def top_functions(self):
+        """The top_n functions by own time, with call counts and cumulative time."""
+        stats = pstats.Stats(self._profile)
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{name} ({_short_path(filename)}:{line})",
+                "calls": calls,
+                "own_ms": round(1000 * own, 2),
+                "cumulative_ms": round(1000 * cumulative, 2),
+            })
+        rows.sort(key=lambda row: row["own_ms"], reverse=True)
+        return rows[:self.top_n]
+
+    def collapsed(self):
+        """Samples as collapsed stacks: 'root;caller;callee count' per line."""
+        return "\n".join(
+            ";".join(_frame_name(frame) for frame in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def speedscope(self):
+        """Samples as a speedscope 'sampled' profile (https://www.speedscope.app)."""
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": _short_path(filename), "line": line})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(round(count * self.sample_interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": "reconciliation",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "exporter": "data-reconciliation",
+        }
+
+    def report(self):
+        """JSON-safe profile: duration, sample count, top functions and the stacks in fmt."""
+        return {
+            "duration_ms": round(1000 * self.duration, 2),
+            "samples": sum(self.stacks.values()),
+            "sample_interval_ms": 1000 * self.sample_interval,
+            "format": self.fmt,
+            "top_functions": self.top_functions(),
+            "stacks": self.collapsed() if self.fmt == 'collapsed' else self.speedscope(),
+        }
+
+def _frame_name(frame):
+    name, filename, line = frame
+    return f"{name} ({_short_path(filename)}:{line})".replace(";", ",")
+
+def _short_path(filename):
+    """Path relative to the backend or site-packages, so reports do not leak install paths."""
+    for marker in ('site-packages' + os.sep, 'backend' + os.sep):
+        if marker in filename:
+            return filename.rsplit(marker, 1)[1]
+    return filename
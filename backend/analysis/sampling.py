@@ -0,0 +1,127 @@
+import logging
+import math
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from .compare import run_compare
+from .exception_table import ExceptionTable
+from .mapping import compile_plan
+from .partitioned import key_hashes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 0.05
+DEFAULT_CONFIDENCE = 0.95
+
+def run_sample_compare(old_chunks, new_chunks, pk_cols, cfg=None,
+                       sample_rate=DEFAULT_SAMPLE_RATE, confidence=DEFAULT_CONFIDENCE):
+    """
+    Estimate the match rate from a sample of primary keys.
+
+    Both inputs are consumed as iterables of already-normalized DataFrame
+    chunks and only rows whose key hashes into the sample are kept, so the
+    same keys are sampled from both files and only the sample is held in
+    memory. The sample is reconciled with run_compare and the result is
+    extended with:
+        - match_pct_ci: [low, high] confidence interval for match_pct
+        - field_mismatch_rates: per compared field, the estimated percent of
+          records that differ, with its own interval
+        - sample: the sample rate and how many rows were read and sampled
+
+    The intervals need the sampled exceptions, so a summary_only plan still
+    collects them and only drops them from the returned result.
+    """
+    df_old, rows_old = _sample_chunks(old_chunks, pk_cols, sample_rate)
+    df_new, rows_new = _sample_chunks(new_chunks, pk_cols, sample_rate)
+    logger.info("Sampled %d of %d old rows and %d of %d new rows", len(df_old), rows_old, len(df_new), rows_new,
+                extra={"rows": len(df_old) + len(df_new)})
+
+    plan = compile_plan(cfg)
+    result = run_compare(df_old, df_new, pk_cols, plan.with_settings(summary_only=False))
+    result.update(estimate_match_rate(result, pk_cols, confidence))
+    if plan.summary_only:
+        result["exceptions"] = ExceptionTable(None, pk_cols)
+    result["sample"] = {
+        "rate": sample_rate,
+        "rows_read_old": rows_old,
+        "rows_read_new": rows_new,
+        "rows_sampled_old": len(df_old),
+        "rows_sampled_new": len(df_new),
+    }
+    return result
+
+def sample_by_key(df, pk_cols, sample_rate):
+    """
+    Rows whose primary key hash falls in the lowest `sample_rate` fraction of
+    the hash space. Equal keys hash alike in every file, so a key is either
+    sampled on both sides or on neither.
+    """
+    cutoff = np.uint64(int(min(max(float(sample_rate), 0.0), 1.0) * 2 ** 53))
+    return df[(key_hashes(df, pk_cols) >> np.uint64(11)) < cutoff]
+
+def estimate_match_rate(result, pk_cols, confidence=DEFAULT_CONFIDENCE):
+    """
+    Confidence intervals for a run_compare result computed on a key sample.
+
+    Records are sampled, not individual fields, and mismatches cluster within
+    records, so the interval for match_pct uses the variance of per-record
+    mismatch fractions: it is a Wilson score interval on the effective number
+    of field comparisons after the design effect of that clustering.
+    Per-field rates are Wilson intervals over the sampled records.
+    """
+    stats = result["stats"]
+    n_records = stats["records_in_both"]
+    fields = stats["compared_fields"]
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    frame = result["exceptions"].frame
+    field_rows = frame[frame["change_type"].isna()]
+
+    rates = {}
+    field_counts = field_rows["field"].value_counts()
+    for field in fields:
+        rate = float(field_counts.get(field, 0)) / n_records if n_records else 0.0
+        low, high = _wilson_interval(rate, n_records, z)
+        rates[field] = {"rate": round(100 * rate, 2), "ci": [round(100 * low, 2), round(100 * high, 2)]}
+
+    n_comparisons = n_records * len(fields)
+    if not n_comparisons:
+        # An empty sample says nothing about the match rate
+        interval = [0.0, 100.0] if not n_records else [result["match_pct"], result["match_pct"]]
+        return {"match_pct_ci": interval, "confidence": confidence, "field_mismatch_rates": rates}
+
+    # Share of compared fields that differ, per sampled record
+    per_record = np.zeros(n_records)
+    mismatching = field_rows.groupby(list(pk_cols), dropna=False).size().to_numpy()
+    per_record[:len(mismatching)] = mismatching / len(fields)
+
+    p = float(per_record.mean())
+    design_effect = 1.0
+    if 0 < p < 1 and n_records > 1:
+        design_effect = max(float(per_record.var(ddof=1)) / n_records / (p * (1 - p) / n_comparisons), 1e-9)
+    low, high = _wilson_interval(p, n_comparisons / design_effect, z)
+
+    return {
+        "match_pct_ci": [round(100 * (1 - high), 2), round(100 * (1 - low), 2)],
+        "confidence": confidence,
+        "field_mismatch_rates": rates,
+    }
+
+def _sample_chunks(chunks, pk_cols, sample_rate):
+    """Keep the sampled rows of every chunk. Returns (sample, rows read)."""
+    sampled, rows = [], 0
+    for chunk in chunks:
+        rows += len(chunk)
+        sampled.append(sample_by_key(chunk, pk_cols, sample_rate))
+    if not sampled:
+        raise ValueError("Input file contains no rows")
+    return pd.concat(sampled, ignore_index=True), rows
+
+def _wilson_interval(p, n, z):
+    """Wilson score interval for a proportion p observed over n trials."""
+    if n <= 0:
+        return 0.0, 1.0
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
@@ -0,0 +1,110 @@
+import pandas as pd
+from .compare import run_compare, combine_results
+
+class UnsortedInputError(ValueError):
+    """Raised when an input expected to be ordered by primary key is not."""
+
+def run_sorted_compare(old_chunks, new_chunks, pk_cols, cfg=None):
+    """
+    Reconcile two inputs that are both sorted by primary key.
+
+    Both inputs are consumed as iterables of already-normalized DataFrame
+    chunks and read exactly once, front to back. Only the current chunk of
+    each side is held in memory. Raises UnsortedInputError as soon as either
+    input turns out not to be sorted, so the caller can fall back to the
+    in-memory merge.
+    """
+    return combine_results(iter_sorted_compare(old_chunks, new_chunks, pk_cols, cfg))
+
+def iter_sorted_compare(old_chunks, new_chunks, pk_cols, cfg=None):
+    """
+    Sort-merge join of two key-ordered chunk streams.
+
+    Two cursors advance through the inputs. Every key below the smaller of
+    the two last-read keys is complete on both sides, so those rows are
+    reconciled with run_compare and their result is yielded straight away.
+    """
+    old = _SortedStream(old_chunks, pk_cols, 'old')
+    new = _SortedStream(new_chunks, pk_cols, 'new')
+    old.advance()
+    new.advance()
+
+    while True:
+        if old.exhausted and new.exhausted:
+            frontier = None  # everything left is complete
+        elif old.exhausted:
+            frontier = new.last_key
+        elif new.exhausted:
+            frontier = old.last_key
+        else:
+            try:
+                frontier = min(old.last_key, new.last_key)
+            except TypeError:
+                raise UnsortedInputError("Keys of the two inputs cannot be ordered against each other")
+
+        old_block = old.take_below(frontier)
+        new_block = new.take_below(frontier)
+        if len(old_block) or len(new_block):
+            yield run_compare(old_block, new_block, pk_cols, cfg)
+
+        if frontier is None:
+            break
+
+        # Keys equal to the frontier may continue in the next chunk, so read
+        # more from whichever side(s) the frontier came from
+        if not old.exhausted and old.last_key == frontier:
+            old.advance()
+        if not new.exhausted and new.last_key == frontier:
+            new.advance()
+
+class _SortedStream:
+    """Cursor over a chunk stream that verifies key order as it reads."""
+
+    def __init__(self, chunks, pk_cols, label):
+        self.chunks = iter(chunks)
+        self.pk_cols = pk_cols
+        self.label = label
+        self.buffer = None
+        self.last_key = None
+        self.exhausted = False
+
+    def advance(self):
+        """Append the next non-empty chunk to the buffer, checking it continues the key order."""
+        for chunk in self.chunks:
+            if self.buffer is None:
+                self.buffer = chunk.iloc[0:0]
+            if chunk.empty:
+                continue
+
+            keys = pd.MultiIndex.from_frame(chunk[self.pk_cols])
+            if not keys.is_monotonic_increasing:
+                raise UnsortedInputError(f"The {self.label} input is not sorted by {self.pk_cols}")
+            if self.last_key is not None:
+                try:
+                    out_of_order = tuple(keys[0]) < self.last_key
+                except TypeError:
+                    out_of_order = True
+                if out_of_order:
+                    raise UnsortedInputError(f"The {self.label} input is not sorted by {self.pk_cols}")
+
+            self.last_key = tuple(keys[-1])
+            self.buffer = pd.concat([self.buffer, chunk], ignore_index=True)
+            return
+
+        self.exhausted = True
+        if self.buffer is None:
+            raise ValueError(f"The {self.label} input contains no rows")
+
+    def take_below(self, frontier):
+        """Remove and return buffered rows with keys strictly below frontier (all rows if None)."""
+        if frontier is None:
+            block, self.buffer = self.buffer, self.buffer.iloc[0:0]
+            return block
+        keys = pd.MultiIndex.from_frame(self.buffer[self.pk_cols])
+        try:
+            cut = keys.get_slice_bound(frontier, side='left')
+        except TypeError:
+            raise UnsortedInputError(f"The {self.label} input has keys that cannot be ordered")
+        block = self.buffer.iloc[:cut]
+        self.buffer = self.buffer.iloc[cut:].reset_index(drop=True)
+        return block
@@ -0,0 +1,129 @@
+import logging
+import xml.etree.ElementTree as ET
+from collections import Counter
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+logger = logging.getLogger(__name__)
+
+# Records per DataFrame chunk when none is given
+DEFAULT_CHUNK_RECORDS = 100_000
+
+# Elements read from the start of a file to detect its record tag
+DETECT_SAMPLE_ELEMENTS = 10_000
+
+def detect_record_tag(path, sample_elements=DETECT_SAMPLE_ELEMENTS):
+    """
+    Tag of the repeating record element, detected from the first
+    `sample_elements` elements of the file.
+
+    A record is an element with child elements or attributes. The shallowest
+    such tag that repeats is the record tag, so nested repeating groups
+    (legs of a trade) do not win over their records; among tags at the same
+    depth the most frequent wins. A file with a single record uses that
+    record's tag, and a flat file (root with leaf children only) uses the
+    most common child of the root, as pandas.read_xml does.
+    """
+    counts = Counter()
+    depths = {}
+    root_children = Counter()
+    depth = 0
+    seen = 0
+    with open(path, 'rb') as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            seen += 1
+            if depth == 1:
+                root_children[elem.tag] += 1
+            if depth >= 1 and (len(elem) or elem.attrib):
+                counts[elem.tag] += 1
+                depths[elem.tag] = min(depths.get(elem.tag, depth), depth)
+            if depth >= 1:
+                # Keep the sample's memory bounded as well
+                elem.clear()
+            if seen >= sample_elements:
+                break
+
+    if counts:
+        repeating = [tag for tag, count in counts.items() if count > 1] or list(counts)
+        return min(repeating, key=lambda tag: (depths[tag], -counts[tag]))
+    if root_children:
+        return root_children.most_common(1)[0][0]
+    raise ValueError(f"No record elements found in {path}")
+
+def iter_xml_chunks(path, chunksize=DEFAULT_CHUNK_RECORDS, record_tag=None):
+    """
+    Stream an XML file as DataFrame chunks of at most `chunksize` records.
+
+    The file is parsed with iterparse and every record is removed from the
+    tree once it has been read, so memory stays flat however large the file
+    is. Each record becomes a row of its attributes and child element texts,
+    keyed by local name (namespaces are dropped), and values are typed the
+    way pandas.read_xml types them. The record tag is detected with
+    detect_record_tag unless given.
+    """
+    if record_tag is None:
+        record_tag = detect_record_tag(path)
+        logger.debug("Detected XML record tag %s in %s", record_tag, path)
+
+    rows = []
+    names = {}
+    # Open elements from the root down, so a finished record can be removed
+    # from its parent
+    parents = []
+    with open(path, 'rb') as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                parents.append(elem)
+                continue
+            parents.pop()
+            if elem.tag != record_tag:
+                continue
+            rows.append(_record(elem, names))
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+            if len(rows) >= chunksize:
+                yield _to_frame(rows)
+                rows = []
+    if rows:
+        yield _to_frame(rows)
+
+def read_xml(path, record_tag=None):
+    """Whole XML file as one DataFrame, read with iter_xml_chunks."""
+    chunks = list(iter_xml_chunks(path, record_tag=record_tag))
+    if not chunks:
+        raise ValueError(f"No {record_tag or 'record'} elements found in {path}")
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+def _record(elem, names):
+    """
+    Attributes and child texts of a record element, as pandas.read_xml reads
+    them: missing or whitespace-only text is None. `names` caches the local
+    name of each tag, since every record repeats them.
+    """
+    row = {}
+    for key, value in elem.attrib.items():
+        row[names.get(key) or names.setdefault(key, local_name(key))] = value
+    for child in elem:
+        tag, text = child.tag, child.text
+        row[names.get(tag) or names.setdefault(tag, local_name(tag))] = \
+            text if text and not text.isspace() else None
+    text = elem.text
+    if not len(elem) and text and not text.isspace():
+        row[local_name(elem.tag)] = text
+    return row
+
+def _to_frame(rows):
+    # Records may leave fields out; columns are in the order they first appear
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    values = [[row.get(col) for col in columns] for row in rows]
+    with TextParser(values, names=columns) as parser:
+        return parser.read()
+
+def local_name(tag):
+    """'{namespace}name' -> 'name'."""
+    return tag.rsplit('}', 1)[-1]
@@ -1,14 +1,27 @@
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from analysis import etl, mapping, compare, graph
-from config import SQLALCHEMY_DATABASE_URI, SQLALCHEMY_TRACK_MODIFICATIONS
-from models import save_to_db, get_historic_data
-from helpers import file_checker, convert_json_safe, parse_uploaded_file
+from analysis import etl, mapping, compare, graph, partitioned, sorted_merge, sampling
+from config import SQLALCHEMY_DATABASE_URI, SQLALCHEMY_TRACK_MODIFICATIONS, STAGE_MEMORY_TRACKING, LOG_LEVEL, \
+    PARSE_CACHE_DIR, PARSE_CACHE_MAX_MB, DATASET_TTL_SECONDS, DATASET_MAX_ENTRIES
+from models import save_to_db, save_stage_timings, get_historic_data
+from helpers import file_checker, convert_json_safe, parse_uploaded_file, iter_file_chunks, read_file_sample, \
+    read_csv_columns
 from models import MatchingData
+import itertools
+import logging
+import os
 import tempfile
+from contextlib import nullcontext
 import pandas as pd
 from db import db
 from analysis.exception_builder import add_summary_to_exceptions
+from analysis.instrumentation import StageTimings, stage, configure_logging
+from analysis.parse_cache import ParseCache
+from analysis.datasets import DatasetStore
+from analysis.profiling import PipelineProfiler, ProfilerBusyError, PROFILE_FORMATS, DEFAULT_TOP_N
+
+configure_logging(LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
@@ -18,6 +31,29 @@ db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# Normalized uploads of full-mode runs, reused when the same file comes back
+# with the same parsing settings
+parse_cache = ParseCache(PARSE_CACHE_DIR, PARSE_CACHE_MAX_MB)
+
+# Normalized pairs of recent full-mode uploads, by the handle /upload returns
+datasets = DatasetStore(DATASET_TTL_SECONDS, DATASET_MAX_ENTRIES)
+
+# Comparison modes accepted by /upload:
+# - full: load both files in memory and compare them in one pass
+# - partitioned: stream both files into on-disk hash partitions (files larger than RAM)
+# - sorted: stream both files with a sort-merge join (inputs already ordered by PK),
+#           falling back to full if either file turns out to be unsorted
+# - sample: estimate the match rate from a primary-key sample, with confidence
+#           intervals; escalates to full when the interval reaches below alert_threshold
+COMPARE_MODES = ('full', 'partitioned', 'sorted', 'sample')
+
+# Bounds of /detect_pk: rows of each file sampled to rank key candidates, how
+# many of the best candidates are verified, and rows of a CSV file read (only
+# the candidate columns) to verify them
+DETECT_PK_SAMPLE_ROWS = 10_000
+DETECT_PK_CANDIDATES = 3
+DETECT_PK_VERIFY_ROWS = 200_000
+
 @app.route('/')
 def home():
     return "Welcome to the Flask App!"
@@ -40,39 +76,107 @@ def upload_files():
     fileOld = request.files['old']
     fileNew = request.files['new']
 
+    # Optional override for the number of column-comparison worker processes
+    workers = request.form.get('workers')
+    if workers:
+        try:
+            workers = int(workers)
+        except ValueError:
+            return jsonify({"error": "workers must be an integer"}), 400
+
+    # Optional match % below which a sampled run is redone in full
+    # (0 is a threshold too, so presence is checked rather than truthiness)
+    alert_threshold = request.form.get('alert_threshold', '').strip() or None
+    if alert_threshold is not None:
+        try:
+            alert_threshold = float(alert_threshold)
+        except ValueError:
+            return jsonify({"error": "alert_threshold must be a number"}), 400
+
+    # Optional profile of the whole run: profile=true, with profile_format
+    # (collapsed or speedscope) and profile_top (number of hot functions)
+    profiler = None
+    if request.form.get('profile', '').strip().lower() in ('1', 'true', 'yes'):
+        profile_format = request.form.get('profile_format') or 'collapsed'
+        if profile_format not in PROFILE_FORMATS:
+            return jsonify({"error": f"Unknown profile_format: {profile_format}. "
+                                     f"Allowed formats are: {', '.join(PROFILE_FORMATS)}"}), 400
+        try:
+            profile_top = int(request.form.get('profile_top') or DEFAULT_TOP_N)
+        except ValueError:
+            return jsonify({"error": "profile_top must be an integer"}), 400
+        profiler = PipelineProfiler(top_n=profile_top, fmt=profile_format)
+
+    # Wall time, CPU time and peak memory of each stage, returned and stored with the result
+    timings = StageTimings(STAGE_MEMORY_TRACKING)
+
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{fileOld.filename}") as tmp_old, \
+        with profiler or nullcontext(), timings.activate(), \
+             tempfile.NamedTemporaryFile(delete=False, suffix=f"_{fileOld.filename}") as tmp_old, \
              tempfile.NamedTemporaryFile(delete=False, suffix=f"_{fileNew.filename}") as tmp_new:
             
             # Save uploaded files to temporary locations
-            fileOld.save(tmp_old.name)
-            fileNew.save(tmp_new.name)
+            with stage('file_save'):
+                fileOld.save(tmp_old.name)
+                fileNew.save(tmp_new.name)
 
             # Load mapping config
             mapping_cfg = mapping.load_mapping('analysis/mapping.yaml')
-            
-            # Use helper functions for file parsing
-            df_old = parse_uploaded_file(tmp_old.name, fileOld.filename)
-            df_new = parse_uploaded_file(tmp_new.name, fileNew.filename)
-            
-            # Normalize data using existing ETL
-            df_old = etl.normalize(df_old, mapping_cfg)
-            df_new = etl.normalize(df_new, mapping_cfg)
+            if workers:
+                mapping_cfg = mapping_cfg.with_settings(parallel_workers=workers)
+            # Monitoring runs can ask for counts only, without exception rows
+            if request.form.get('summary_only', '').strip().lower() in ('1', 'true', 'yes'):
+                mapping_cfg = mapping_cfg.with_settings(summary_only=True)
+
+            mode = request.form.get('mode') or mapping_cfg.get('mode', 'full')
+            if mode not in COMPARE_MODES:
+                return jsonify({"error": f"Unknown mode: {mode}. Allowed modes are: {', '.join(COMPARE_MODES)}"}), 400
 
             # Get primary key from frontend, fallback to auto-detect
             pk_str = request.form.get('primary_key')
-            if pk_str:
-                pk_cols = [col.strip() for col in pk_str.split(',') if col.strip()]
-            else:
-                pk_cols = mapping.detect_primary_key(df_old, df_new)
-
-            # Run comparison
-            result = compare.run_compare(df_old, df_new, pk_cols, mapping_cfg)
+            pk_cols = [col.strip() for col in pk_str.split(',') if col.strip()] if pk_str else None
+
+            sample_estimate = None
+            if mode == 'sample':
+                result, pk_cols, common_cols = _compare_sample(
+                    tmp_old.name, fileOld.filename, tmp_new.name, fileNew.filename, pk_cols, mapping_cfg
+                )
+                sample_estimate = {key: result[key] for key in
+                                   ("match_pct", "match_pct_ci", "confidence", "field_mismatch_rates", "sample")}
+                threshold = alert_threshold if alert_threshold is not None else mapping_cfg.get('alert_threshold')
+                if threshold is not None and result["match_pct_ci"][0] < float(threshold):
+                    logger.info("Sampled match rate interval %s reaches below %s%%. Escalating to a full comparison.",
+                                result["match_pct_ci"], threshold)
+                    sample_estimate["escalated"] = True
+                    mode = 'full'
+
+            if mode == 'sorted':
+                try:
+                    result, pk_cols, common_cols = _compare_sorted(
+                        tmp_old.name, fileOld.filename, tmp_new.name, fileNew.filename, pk_cols, mapping_cfg
+                    )
+                except sorted_merge.UnsortedInputError as e:
+                    logger.info("%s. Falling back to full comparison.", e)
+                    mode = 'full'
+
+            if mode == 'partitioned':
+                result, pk_cols, common_cols = _compare_partitioned(
+                    tmp_old.name, fileOld.filename, tmp_new.name, fileNew.filename, pk_cols, mapping_cfg
+                )
+            elif mode == 'full':
+                df_old = _load_normalized(tmp_old.name, fileOld.filename, mapping_cfg)
+                df_new = _load_normalized(tmp_new.name, fileNew.filename, mapping_cfg)
+
+                if not pk_cols:
+                    with stage('detect_primary_key'):
+                        pk_cols = mapping.detect_primary_key(df_old, df_new)
+
+                # Run comparison
+                result = compare.run_compare(df_old, df_new, pk_cols, mapping_cfg)
+
+                # Get available columns for frontend
+                common_cols = list(set(df_old.columns) & set(df_new.columns))
 
-            # Add summary to exceptions AFTER comparison
-            if result and result.get('exceptions'):
-                result['exceptions'] = add_summary_to_exceptions(result['exceptions'], mapping_cfg)
-            
             # Generate system name from filename (remove extension and normalize)
             system_name = fileOld.filename.rsplit('.', 1)[0].lower().strip()
             
@@ -80,44 +184,169 @@ def upload_files():
             if mapping_cfg.get("pair_name") and mapping_cfg.get("pair_name") != "unknown":
                 system_name = mapping_cfg.get("pair_name")
 
-            # Get available columns for frontend
-            common_cols = list(set(df_old.columns) & set(df_new.columns))
+            extra = {}
+            if sample_estimate:
+                extra["sample_estimate"] = sample_estimate
+            if mode == 'full':
+                # Keep the normalized pair so /compare can re-run it with another primary key
+                handle = datasets.put(df_old, df_new, system_name=system_name, plan=mapping_cfg,
+                                      primary_key=pk_cols, columns=common_cols)
+                extra["dataset"] = datasets.describe(handle)
+
+            return _finish_comparison(result, system_name, pk_cols, common_cols, mapping_cfg, mode,
+                                      timings, profiler, extra)
+
+    except compare.DuplicateKeyError as e:
+        return jsonify({"error": str(e)}), 400
+    except ProfilerBusyError as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.exception("Upload failed: %s", e)
+        return jsonify({"error": f"Upload failed: {str(e)}"}), 500
+    finally:
+        # Clean up temporary files
+        try:
+            if 'tmp_old' in locals():
+                os.unlink(tmp_old.name)
+            if 'tmp_new' in locals():
+                os.unlink(tmp_new.name)
+        except:
+            pass  # Ignore cleanup errors
 
-            # Prepare result for database
-            result_for_db = {
-                "system_name": system_name,
-                "date": pd.Timestamp.now(),
-                "match_pct": result["match_pct"],
-                "exceptions": result["exceptions"],
-                "primary_key": pk_cols
-            }
+@app.route('/compare', methods=['POST'])
+def compare_dataset():
+    '''
+    Compare an uploaded pair again, e.g. with another primary key, without
+    uploading the files again. Takes the `dataset` handle a full-mode /upload
+    returned and an optional `primary_key` (comma-separated or a JSON list;
+    the upload's key by default), as JSON or form fields. The pair is
+    compared with the mapping it was uploaded with, including the upload's
+    summary_only and workers; `summary_only` (true/false) and `workers` sent
+    here override them for this run only. The run is saved like an upload.
+    Unknown or expired handles get a 404: upload the files again.
+    '''
+    payload = request.get_json(silent=True) or request.form
+    handle = payload.get('dataset')
+    if not handle:
+        return jsonify({"error": "Missing dataset handle"}), 400
+    entry = datasets.get(handle)
+    if entry is None:
+        return jsonify({"error": "Unknown or expired dataset; upload the files again"}), 404
+
+    pk = payload.get('primary_key')
+    if isinstance(pk, str):
+        pk = pk.split(',')
+    pk_cols = [str(col).strip() for col in pk or [] if str(col).strip()] or entry['primary_key']
+    missing = [col for col in pk_cols if col not in entry['columns']]
+    if missing:
+        return jsonify({"error": f"Primary key columns not in both files: {', '.join(missing)}"}), 400
+
+    # Settings not sent keep the values the pair was uploaded with
+    overrides = {}
+    summary_only = str(payload.get('summary_only', '')).strip().lower()
+    if summary_only:
+        overrides['summary_only'] = summary_only in ('1', 'true', 'yes')
+    workers = payload.get('workers')
+    if workers not in (None, ''):
+        try:
+            overrides['parallel_workers'] = int(workers)
+        except (TypeError, ValueError):
+            return jsonify({"error": "workers must be an integer"}), 400
+    mapping_cfg = entry['plan'].with_settings(**overrides) if overrides else entry['plan']
 
-            # Save to database
-            try:
-                saved_data = save_to_db(result_for_db)
-                analysis_id = saved_data.get('id')
-            except Exception as e:
-                return jsonify({"error": f"Database save failed: {str(e)}"}), 500
-
-            # Prepare response for frontend
-            response_data = {
-                "match_pct": result["match_pct"],
-                "exceptions": result["exceptions"],
-                "primary_key": pk_cols,
-                "system_name": system_name,
-                "date": result_for_db["date"].isoformat(),
-                "available_columns": common_cols,  # Send available columns to frontend
-                "analysis_id": analysis_id  # Include analysis ID for exception management
-            }
+    timings = StageTimings(STAGE_MEMORY_TRACKING)
+    try:
+        with timings.activate():
+            result = compare.run_compare(entry['old'], entry['new'], pk_cols, mapping_cfg)
+            return _finish_comparison(result, entry['system_name'], pk_cols, entry['columns'], mapping_cfg, 'full',
+                                      timings, extra={"dataset": datasets.describe(handle)})
+    except compare.DuplicateKeyError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("Comparison failed: %s", e)
+        return jsonify({"error": f"Comparison failed: {str(e)}"}), 500
 
-            return jsonify(convert_json_safe(response_data)), 200
+@app.route('/detect_pk', methods=['POST'])
+def detect_pk():
+    '''
+    Suggest a primary key for two files without comparing them. Only the
+    first DETECT_PK_SAMPLE_ROWS rows of each file are parsed and normalized;
+    columns unique in both samples are ranked (mapping.rank_key_candidates)
+    and the best DETECT_PK_CANDIDATES are verified to be exactly unique (see
+    _verify_key_candidates). The first verified candidate is suggested, or
+    mapping.detect_primary_key's choice on the samples when none holds.
+    Returns primary_key, available_columns and the verified candidates, with
+    how far the suggestion is established: verified_rows holds the rows of
+    each file the key was found unique on (None for a best guess from the
+    samples), and exact is true only if that was every row of both files.
+    A suggestion that is not exact can still have duplicates further down.
+    '''
+    if 'old' not in request.files or 'new' not in request.files:
+        return jsonify({"error": "Missing one or more required files"}), 400
+
+    try:
+        if not file_checker(request.files['old']) or not file_checker(request.files['new']):
+            return jsonify({"error": "Invalid file type. Only CSV, XLSX, XLS, and XML files are allowed."}), 401
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    fileOld = request.files['old']
+    fileNew = request.files['new']
+    timings = StageTimings(STAGE_MEMORY_TRACKING)
+
+    try:
+        with timings.activate(), \
+             tempfile.NamedTemporaryFile(delete=False, suffix=f"_{fileOld.filename}") as tmp_old, \
+             tempfile.NamedTemporaryFile(delete=False, suffix=f"_{fileNew.filename}") as tmp_new:
+
+            with stage('file_save'):
+                fileOld.save(tmp_old.name)
+                fileNew.save(tmp_new.name)
+
+            mapping_cfg = mapping.load_mapping('analysis/mapping.yaml')
+
+            with stage('parse_uploaded_file'):
+                raw_old = read_file_sample(tmp_old.name, fileOld.filename, DETECT_PK_SAMPLE_ROWS, mapping_cfg)
+                raw_new = read_file_sample(tmp_new.name, fileNew.filename, DETECT_PK_SAMPLE_ROWS, mapping_cfg)
+            if raw_old.empty or raw_new.empty:
+                return jsonify({"error": "Both files must contain at least one row"}), 400
+            with stage('etl.normalize'):
+                sample_old = etl.normalize(raw_old, mapping_cfg)
+                sample_new = etl.normalize(raw_new, mapping_cfg)
+
+            with stage('detect_primary_key'):
+                ranked = mapping.rank_key_candidates(sample_old, sample_new)[:DETECT_PK_CANDIDATES]
+                candidates = _verify_key_candidates(
+                    (tmp_old.name, fileOld.filename, raw_old, sample_old),
+                    (tmp_new.name, fileNew.filename, raw_new, sample_new),
+                    ranked, mapping_cfg,
+                )
+                verified = [candidate for candidate in candidates if candidate["unique"]]
+                if verified:
+                    pk_cols = verified[0]["columns"]
+                    verified_rows, exact = verified[0]["rows_checked"], verified[0]["complete"]
+                else:
+                    pk_cols = mapping.detect_primary_key(sample_old, sample_new)
+                    verified_rows, exact = None, False
+
+        response_data = {
+            "primary_key": pk_cols,
+            "verified_rows": verified_rows,
+            "exact": exact,
+            "available_columns": [col for col in sample_old.columns if col in sample_new.columns],
+            "candidates": candidates,
+            "sample_rows": {"old": len(sample_old), "new": len(sample_new)},
+            "timings": timings.to_list(),
+        }
+        logger.info("Suggested primary key %s for %s", pk_cols, fileOld.filename,
+                    extra={"duration_ms": timings.elapsed_ms()})
+        return jsonify(convert_json_safe(response_data)), 200
 
     except Exception as e:
-        return jsonify({"error": f"Upload failed: {str(e)}"}), 500
+        logger.exception("Primary key detection failed: %s", e)
+        return jsonify({"error": f"Primary key detection failed: {str(e)}"}), 500
     finally:
-        # Clean up temporary files
         try:
-            import os
             if 'tmp_old' in locals():
                 os.unlink(tmp_old.name)
             if 'tmp_new' in locals():
@@ -125,6 +354,213 @@ def upload_files():
         except:
             pass  # Ignore cleanup errors
 
+def _verify_key_candidates(old, new, candidates, mapping_cfg):
+    '''
+    Check single-column key candidates for exact uniqueness past the sample.
+    old and new are (path, filename, raw sample, normalized sample). A CSV
+    file whose sample stopped at DETECT_PK_SAMPLE_ROWS is read again up to
+    DETECT_PK_VERIFY_ROWS rows, only the candidate columns; other files are
+    checked on the sample (Excel and XML rows cannot be read column by
+    column). Returns one dict per candidate: columns, unique, rows_checked
+    per file and complete (whether every row of both files was checked).
+    '''
+    if not candidates:
+        return []
+
+    checked = []
+    for path, name, raw, sample in (old, new):
+        if name.lower().endswith('.csv') and len(raw) >= DETECT_PK_SAMPLE_ROWS:
+            # Header names of the normalized candidate columns
+            headers = dict(zip(sample.columns, raw.columns))
+            df = read_csv_columns(path, [headers[col] for col in candidates], DETECT_PK_VERIFY_ROWS, mapping_cfg)
+            df = etl.normalize(df, mapping_cfg)
+            checked.append((df, len(df) < DETECT_PK_VERIFY_ROWS))
+        else:
+            checked.append((sample, len(raw) < DETECT_PK_SAMPLE_ROWS))
+    (df_old, complete_old), (df_new, complete_new) = checked
+
+    return [{
+        "columns": [col],
+        "unique": bool(df_old[col].is_unique and df_new[col].is_unique),
+        "rows_checked": {"old": len(df_old), "new": len(df_new)},
+        "complete": complete_old and complete_new,
+    } for col in candidates]
+
+def _finish_comparison(result, system_name, pk_cols, common_cols, mapping_cfg, mode, timings, profiler=None, extra=None):
+    '''
+    Shared end of /upload and /compare: summarize the exceptions, save the run
+    and its stage timings, and build the JSON response (with `extra` fields
+    such as sample_estimate or dataset). Must run inside timings.activate().
+    '''
+    # Add summary to exceptions AFTER comparison
+    if result and result.get('exceptions'):
+        with stage('add_summary_to_exceptions'):
+            result['exceptions'] = add_summary_to_exceptions(result['exceptions'], mapping_cfg)
+    
+    # Prepare result for database
+    result_for_db = {
+        "system_name": system_name,
+        "date": pd.Timestamp.now(),
+        "match_pct": result["match_pct"],
+        "exceptions": result["exceptions"],
+        "num_exceptions": result["stats"]["exception_count"],
+        "primary_key": pk_cols
+    }
+
+    # Save to database
+    try:
+        with stage('save_to_db'):
+            saved_data = save_to_db(result_for_db)
+        analysis_id = saved_data.get('id')
+    except Exception as e:
+        return jsonify({"error": f"Database save failed: {str(e)}"}), 500
+
+    # Prepare response for frontend
+    response_data = {
+        "match_pct": result["match_pct"],
+        "exceptions": result["exceptions"].to_dicts(),
+        "primary_key": pk_cols,
+        "system_name": system_name,
+        "date": result_for_db["date"].isoformat(),
+        "available_columns": common_cols,  # Send available columns to frontend
+        "analysis_id": analysis_id  # Include analysis ID for exception management
+    }
+    response_data.update(extra or {})
+    if mapping_cfg.summary_only:
+        response_data["summary_only"] = True
+        response_data["num_exceptions"] = result["stats"]["exception_count"]
+        response_data["field_exception_counts"] = result["stats"]["field_exception_counts"]
+
+    with stage('json_serialization'):
+        response_data = convert_json_safe(response_data)
+
+    if profiler:
+        profiler.stop()
+        response_data["profile"] = profiler.report()
+
+    # Timings cover everything up to here; jsonify of the converted
+    # payload below is not included
+    response_data["timings"] = timings.to_list()
+    try:
+        save_stage_timings(analysis_id, response_data["timings"])
+    except Exception as e:
+        logger.warning("Saving stage timings failed: %s", e, extra={"analysis_id": analysis_id})
+
+    logger.info("Reconciled %s (%s mode): match %s%%", system_name, mode, result["match_pct"], extra={
+        "system_name": system_name, "analysis_id": analysis_id,
+        "rows": result["stats"]["records_in_both"], "duration_ms": timings.elapsed_ms(),
+    })
+    return jsonify(response_data), 200
+
+def _load_normalized(path, name, mapping_cfg):
+    '''
+    Parse and normalize one uploaded file, or read the result from the parse
+    cache when the same file was parsed before with the same mapping.
+    '''
+    key = None
+    if parse_cache.enabled:
+        with stage('parse_cache_lookup'):
+            key = parse_cache.key(path, name, mapping_cfg)
+            df = parse_cache.get(key)
+        if df is not None:
+            logger.info("Parse cache hit for %s", name, extra={"rows": len(df)})
+            return df
+
+    with stage('parse_uploaded_file'):
+        df = parse_uploaded_file(path, name, mapping_cfg)
+    with stage('etl.normalize'):
+        df = etl.normalize(df, mapping_cfg)
+
+    if key:
+        with stage('parse_cache_store'):
+            parse_cache.put(key, df)
+    return df
+
+def _compare_partitioned(old_path, old_name, new_path, new_name, pk_cols, mapping_cfg):
+    '''
+    Reconcile two uploaded files without loading either of them whole. Both are
+    streamed in chunks sized from memory_budget_mb, normalized chunk by chunk
+    and hash-partitioned on the primary key before comparison.
+    Returns (result, pk_cols, common_cols).
+    '''
+    budget = mapping_cfg.get('memory_budget_mb', partitioned.DEFAULT_MEMORY_BUDGET_MB)
+    old_chunks, new_chunks, pk_cols, common_cols = _open_chunk_streams(
+        old_path, old_name, new_path, new_name, pk_cols, mapping_cfg, budget
+    )
+
+    num_partitions = partitioned.plan_partitions(os.path.getsize(old_path) + os.path.getsize(new_path), budget)
+    result = partitioned.run_partitioned_compare(
+        old_chunks, new_chunks, pk_cols, mapping_cfg, num_partitions=num_partitions
+    )
+    return result, pk_cols, common_cols
+
+def _compare_sorted(old_path, old_name, new_path, new_name, pk_cols, mapping_cfg):
+    '''
+    Reconcile two uploaded files that are already ordered by primary key with a
+    streaming sort-merge join: each file is read once, chunk by chunk.
+    Raises sorted_merge.UnsortedInputError if either file is not sorted.
+    Returns (result, pk_cols, common_cols).
+    '''
+    budget = mapping_cfg.get('memory_budget_mb', partitioned.DEFAULT_MEMORY_BUDGET_MB)
+    old_chunks, new_chunks, pk_cols, common_cols = _open_chunk_streams(
+        old_path, old_name, new_path, new_name, pk_cols, mapping_cfg, budget
+    )
+    result = sorted_merge.run_sorted_compare(old_chunks, new_chunks, pk_cols, mapping_cfg)
+    return result, pk_cols, common_cols
+
+def _compare_sample(old_path, old_name, new_path, new_name, pk_cols, mapping_cfg):
+    '''
+    Estimate the match rate of two uploaded files from a sample of primary keys.
+    Files are streamed so only the sampled rows are kept in memory.
+    Returns (result, pk_cols, common_cols).
+    '''
+    budget = mapping_cfg.get('memory_budget_mb', partitioned.DEFAULT_MEMORY_BUDGET_MB)
+    old_chunks, new_chunks, pk_cols, common_cols = _open_chunk_streams(
+        old_path, old_name, new_path, new_name, pk_cols, mapping_cfg, budget
+    )
+
+    result = sampling.run_sample_compare(
+        old_chunks, new_chunks, pk_cols, mapping_cfg,
+        sample_rate=float(mapping_cfg.get('sample_rate', sampling.DEFAULT_SAMPLE_RATE)),
+        confidence=float(mapping_cfg.get('sample_confidence', sampling.DEFAULT_CONFIDENCE)),
+    )
+    return result, pk_cols, common_cols
+
+def _open_chunk_streams(old_path, old_name, new_path, new_name, pk_cols, mapping_cfg, memory_budget_mb):
+    '''
+    Open both files as streams of normalized chunks sized for the memory budget.
+    The first chunk of each file is read up front to find the common columns
+    and, when none was given, to detect the primary key.
+    Returns (old_chunks, new_chunks, pk_cols, common_cols).
+    '''
+    def normalized_chunks(path, name):
+        # Chunks are read lazily while the comparison consumes them, so each
+        # read and normalize is timed on its own
+        rows = partitioned.chunk_rows_for_budget(path, memory_budget_mb)
+        chunks = iter_file_chunks(path, name, rows, mapping_cfg)
+        while True:
+            with stage('parse_uploaded_file'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            with stage('etl.normalize'):
+                chunk = etl.normalize(chunk, mapping_cfg)
+            yield chunk
+
+    old_chunks = normalized_chunks(old_path, old_name)
+    new_chunks = normalized_chunks(new_path, new_name)
+
+    first_old = next(old_chunks, None)
+    first_new = next(new_chunks, None)
+    if first_old is None or first_new is None:
+        raise ValueError("Both files must contain at least one row")
+    if not pk_cols:
+        with stage('detect_primary_key'):
+            pk_cols = mapping.detect_primary_key(first_old, first_new)
+    common_cols = list(set(first_old.columns) & set(first_new.columns))
+
+    return itertools.chain([first_old], old_chunks), itertools.chain([first_new], new_chunks), pk_cols, common_cols
+
 @app.route('/db_check')
 def db_check():
     try:
@@ -328,7 +764,7 @@ def reject_exceptions():
                 db.session.add(rejection_record)
                 rejection_count += 1
             except Exception as e:
-                print(f"Failed to add rejection record for exception {exc_id}: {e}")
+                logger.warning("Failed to add rejection record for exception %s: %s", exc_id, e)
                 continue
         
         db.session.commit()
@@ -1,2 +1,32 @@
-SQLALCHEMY_DATABASE_URI = "postgresql://postgres:1@localhost:5432/reconcile"
-SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+import os
+import tempfile
+
+# Environment variables of the same name override these, e.g. to point a
+# local run or the load-test harness at SQLite:
+#   SQLALCHEMY_DATABASE_URI=sqlite:////tmp/reconcile.db
+SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI", "postgresql://postgres:1@localhost:5432/reconcile")
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# How /upload measures peak memory per stage: rss, tracemalloc or off
+# (see analysis/instrumentation.py). rss gives each stage's peak resident
+# memory above the one it started with (Linux only; other systems get no
+# figures) and costs next to nothing. tracemalloc
+# gives exact per-stage peaks but traces every allocation of the whole
+# process, slowing the run it measures 5-9x (500k rows: run_compare 0.9s ->
+# 4.6s, save_to_db 3.1s -> 27s) and any request running alongside it; only
+# turn it on to diagnose memory use
+STAGE_MEMORY_TRACKING = os.environ.get("STAGE_MEMORY_TRACKING", "rss")
+
+# Level for the backend's loggers; DEBUG adds per-stage and per-column detail
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
+# Parsed and normalized uploads are cached as Parquet in this directory, up to
+# PARSE_CACHE_MAX_MB (least recently used entries go first); 0 disables the
+# cache, which also needs pyarrow (see analysis/parse_cache.py)
+PARSE_CACHE_DIR = os.environ.get("PARSE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "recon_parse_cache"))
+PARSE_CACHE_MAX_MB = float(os.environ.get("PARSE_CACHE_MAX_MB", "2048"))
+
+# Normalized pairs of full-mode uploads stay in memory for /compare re-runs
+# until unused for DATASET_TTL_SECONDS; at most DATASET_MAX_ENTRIES pairs are kept
+DATASET_TTL_SECONDS = int(os.environ.get("DATASET_TTL_SECONDS", "1800"))
+DATASET_MAX_ENTRIES = int(os.environ.get("DATASET_MAX_ENTRIES", "4"))
@@ -1,7 +1,29 @@
+import codecs
+import logging
 import numpy as np
 import pandas as pd
-import xml.etree.ElementTree as ET
-from collections import Counter
+from analysis.etl import column_key
+from analysis.excel_stream import iter_excel_chunks, read_excel
+from analysis.mapping import compile_plan
+from analysis.xml_stream import iter_xml_chunks, read_xml
+
+try:
+    import pyarrow
+    import pyarrow.compute as pyarrow_compute
+    import pyarrow.csv as pyarrow_csv  # multithreaded CSV reader
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    pyarrow = None
+    CSV_ENGINE = 'c'
+
+# Bytes read from the start of a file to detect its encoding
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# Values read_csv reads as missing by default; pyarrow's own list lacks some
+CSV_NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                   '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+logger = logging.getLogger(__name__)
 
 def file_checker(file):
     '''
@@ -35,17 +57,19 @@ def convert_json_safe(obj):
     else:
         return obj
 
-def parse_uploaded_file(file_path: str, filename: str) -> pd.DataFrame:
+def parse_uploaded_file(file_path: str, filename: str, plan=None) -> pd.DataFrame:
     """
     Parse uploaded files of different types (CSV, Excel, XML).
-    This handles all file parsing logic for the backend.
+    This handles all file parsing logic for the backend. With a mapping plan,
+    CSV files are read with its dtype hints and without ignored columns, and
+    Excel files without ignored columns from the sheets it names.
     """
     try:
         # Determine file type from extension
         if filename.lower().endswith('.csv'):
-            return parse_csv_file(file_path)
+            return parse_csv_file(file_path, plan)
         elif filename.lower().endswith(('.xls', '.xlsx')):
-            return parse_excel_file(file_path)
+            return parse_excel_file(file_path, plan)
         elif filename.lower().endswith('.xml'):
             return parse_xml_file(file_path)
         else:
@@ -53,78 +77,355 @@ def parse_uploaded_file(file_path: str, filename: str) -> pd.DataFrame:
     except Exception as e:
         raise Exception(f"Failed to parse {filename}: {str(e)}")
 
-def parse_csv_file(file_path: str) -> pd.DataFrame:
+def parse_csv_file(file_path: str, plan=None) -> pd.DataFrame:
     """
-    Parse CSV files with encoding detection and error handling.
+    Parse a CSV file in one pass.
+
+    The encoding is detected once from a byte sample. pyarrow's CSV reader is
+    used when pyarrow is installed, with the dtype hints as its column types
+    (see _read_csv). With a mapping plan, columns are read with
+    the fields' dtype hints and `type: ignore` columns are skipped (see
+    csv_read_options). If a column does not fit its numeric hint, the file is
+    read again with text hints only and pandas infers the numeric columns.
     """
     try:
-        return pd.read_csv(file_path)
-    except UnicodeDecodeError:
-        # Try different encodings if UTF-8 fails
+        encoding = detect_file_encoding(file_path)
         try:
-            return pd.read_csv(file_path, encoding='latin-1')
+            options = csv_read_options(file_path, encoding, plan)
         except UnicodeDecodeError:
-            return pd.read_csv(file_path, encoding='utf-8-sig')
+            # The sample looked like UTF-8 but the file is not
+            encoding = 'latin-1'
+            options = csv_read_options(file_path, encoding, plan)
+
+        try:
+            return _read_csv(file_path, encoding, options)
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+            return _read_csv(file_path, encoding, options)
+        except (ValueError, TypeError) as e:
+            if not options.get('dtype'):
+                raise
+            logger.info("Column types from the mapping do not fit %s, inferring numeric columns: %s", file_path, e)
+            return _read_csv(file_path, encoding, _text_hints_only(options))
     except Exception as e:
         raise Exception(f"Failed to parse CSV file: {str(e)}")
 
-def parse_excel_file(file_path: str) -> pd.DataFrame:
+def csv_read_options(file_path: str, encoding: str, plan=None) -> dict:
     """
-    Parse Excel files with different engine fallbacks.
+    read_csv keyword arguments derived from a mapping plan and the file's header:
+    - usecols: every column except those mapped to `type: ignore` (primary
+      key columns are always kept)
+    - dtype: each mapped column's FieldPlan.dtype (float64 for decimal, Int64
+      for integer, str for string and date; dates are parsed by the comparator)
+    Columns are matched the way etl.normalize names them. No plan, no options.
+
+    read_csv parses Int64 through Python objects, many times slower than its
+    native integer parser, so _read_csv lets pandas infer integer columns
+    and converts them to Int64 afterwards.
     """
-    try:
-        return pd.read_excel(file_path, engine='openpyxl')
-    except Exception:
+    if plan is None:
+        return {}
+    plan = compile_plan(plan)
+    fields = {field.source: field for field in plan.fields.values()}
+    skipped = skipped_columns(plan)
+
+    header = pd.read_csv(file_path, nrows=0, encoding=encoding).columns
+    usecols, dtype = [], {}
+    for col in header:
+        if column_key(col) in skipped:
+            continue
+        usecols.append(col)
+        field = fields.get(column_key(col))
+        if field is not None and field.dtype:
+            dtype[col] = field.dtype
+
+    options = {}
+    if len(usecols) < len(header):
+        options['usecols'] = usecols
+    if dtype:
+        options['dtype'] = dtype
+    return options
+
+def skipped_columns(plan=None) -> frozenset:
+    """Source column keys of a plan's `type: ignore` fields, except primary key columns."""
+    if plan is None:
+        return frozenset()
+    plan = compile_plan(plan)
+    return frozenset(field.source for field in plan.fields.values()
+                     if field.type == 'ignore' and field.name not in plan.pk)
+
+def excel_sheets(plan=None) -> tuple:
+    """Sheets named by the plan's `sheet` setting (a name, a 0-based position or a list); the first by default."""
+    sheet = compile_plan(plan).get('sheet', 0) if plan is not None else 0
+    sheets = tuple(sheet) if isinstance(sheet, (list, tuple)) else (sheet,)
+    if not sheets:
+        raise ValueError("sheet must name at least one sheet")
+    return sheets
+
+def _read_csv(file_path, encoding, options):
+    """
+    read_csv with `options`, through pyarrow when it is installed.
+
+    pandas' own pyarrow engine infers every column and only casts to the
+    dtype hints afterwards, so str-hinted codes would lose leading zeros and
+    unhinted integer columns with blanks fail the cast. pyarrow's CSV reader
+    is therefore called directly, with the hints as column types (see
+    _read_csv_arrow). Files it cannot read, e.g. with a value that does not
+    fit its column's type or bytes invalid in the encoding, and files it
+    would type differently from read_csv are read with the c engine, which
+    raises the errors the callers handle.
+    """
+    dtype = options.get('dtype') or {}
+    integers = [col for col, kind in dtype.items() if kind == 'Int64']
+    if integers:
+        options = {**options, 'dtype': {col: kind for col, kind in dtype.items() if kind != 'Int64'} or None}
+    if CSV_ENGINE == 'pyarrow':
         try:
-            # Try with different engine for older Excel files
-            return pd.read_excel(file_path, engine='xlrd')
-        except Exception as e:
-            raise Exception(f"Failed to parse Excel file: {str(e)}")
+            df = _read_csv_arrow(file_path, encoding, options)
+            if df is not None:
+                return _to_nullable_integers(df, integers)
+        except pyarrow.ArrowInvalid as e:
+            logger.info("pyarrow cannot read %s, reading it with the c engine: %s", file_path, e)
+    return _to_nullable_integers(pd.read_csv(file_path, encoding=encoding, engine='c', **options), integers)
+
+def _read_csv_arrow(file_path, encoding, options):
+    """
+    pyarrow.csv.read_csv with read_csv's usecols and float64/str dtype hints
+    as column types, read_csv's missing values and read_csv's column names
+    (duplicate names get .1, .2 suffixes, blank ones are "Unnamed: i").
+    Where pyarrow's inference differs from read_csv's on the first block,
+    the column is typed the way read_csv types it: dates and timestamps as
+    strings, and columns without any value as float64.
+
+    Returns None for a file with integers beyond the int64 range, which
+    pyarrow reads as float64, losing digits (read_csv keeps them exact as
+    uint64 or objects).
+    """
+    hints = options.get('dtype') or {}
+    arrow_types = {'float64': pyarrow.float64(), 'str': pyarrow.string()}
+    column_types = {col: arrow_types[kind] for col, kind in hints.items()}
+    header = pd.read_csv(file_path, nrows=0, encoding=encoding).columns
+    # pyarrow decodes UTF-8 itself and skips a byte order mark
+    read_options = pyarrow_csv.ReadOptions(encoding='utf8' if encoding in ('utf-8', 'utf-8-sig') else encoding,
+                                           column_names=list(header), skip_rows=1)
+
+    def convert_options():
+        return pyarrow_csv.ConvertOptions(column_types=column_types, include_columns=options.get('usecols'),
+                                          null_values=CSV_NULL_VALUES, strings_can_be_null=True)
+
+    with pyarrow_csv.open_csv(file_path, read_options=read_options, convert_options=convert_options()) as reader:
+        for field in reader.schema:
+            if pyarrow.types.is_temporal(field.type):
+                column_types[field.name] = pyarrow.string()
+            elif pyarrow.types.is_null(field.type):
+                column_types[field.name] = pyarrow.float64()
+    table = pyarrow_csv.read_csv(file_path, read_options=read_options, convert_options=convert_options())
+
+    # pyarrow infers double for integers that do not fit int64, and a double
+    # holds no more than 17 significant digits
+    for name, column in zip(table.column_names, table.columns):
+        if pyarrow.types.is_floating(column.type) and hints.get(name) != 'float64':
+            largest = pyarrow_compute.max(pyarrow_compute.abs(column)).as_py()
+            if largest is not None and largest >= 2 ** 63:
+                logger.info("Column %s of %s holds numbers beyond int64, reading it with the c engine", name, file_path)
+                return None
+    return table.to_pandas()
+
+def _to_nullable_integers(df, columns):
+    """Convert inferred numeric columns to Int64 where that loses nothing."""
+    for col in columns:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            try:
+                df[col] = df[col].astype('Int64')
+            except (TypeError, ValueError):
+                pass  # fractional values; leave the column as float
+    return df
+
+def _iter_csv_chunks(file_path, chunksize, encoding, options):
+    """
+    Chunked read_csv in which every chunk has the same column types.
+
+    read_csv infers types chunk by chunk, so a column could be int64 in one
+    chunk, float64 in one with blanks and text in a third, and partitions or
+    merges built from the chunks would not match a full read. The types are
+    taken once instead, from the first chunk read like _read_csv reads the
+    file (dtype hints and Int64 handling included), and the other chunks are
+    read with them (see _chunk_types). A later value that does not fit its
+    column's type raises ValueError rather than changing the type midway.
+
+    The c engine reads the chunks: its chunksize counts rows and it names and
+    types columns the way read_csv does, whereas pyarrow's streaming reader
+    (open_csv) hands out batches of a block size in bytes, and the header
+    and large-integer checks of _read_csv_arrow would have to be repeated
+    for every batch.
+    """
+    dtype = options.get('dtype') or {}
+    integers = [col for col, kind in dtype.items() if kind == 'Int64']
+    if integers:
+        options = {**options, 'dtype': {col: kind for col, kind in dtype.items() if kind != 'Int64'} or None}
+    first = _to_nullable_integers(pd.read_csv(file_path, nrows=chunksize, encoding=encoding, engine='c', **options),
+                                  integers)
+    types = _chunk_types(first)
+    # Converted after reading: read_csv parses Int64 and boolean through Python objects
+    converted = {col: kind for col, kind in types.items() if kind in ('Int64', 'boolean')}
+    if len(first):
+        yield _with_types(first, converted)
+    if len(first) < chunksize:
+        return
+
+    read_types = {col: kind for col, kind in types.items() if col not in converted}
+    rows_read = len(first)
+    try:
+        # skiprows counts records, so quoted line breaks in the first chunk are skipped correctly
+        with pd.read_csv(file_path, chunksize=chunksize, encoding=encoding, engine='c',
+                         skiprows=range(1, rows_read + 1), **{**options, 'dtype': read_types}) as reader:
+            for chunk in reader:
+                chunk = _with_types(chunk, converted)
+                rows_read += len(chunk)
+                yield chunk
+    except UnicodeDecodeError:
+        raise  # a ValueError too, which iter_file_chunks handles itself
+    except (ValueError, TypeError, OverflowError) as e:
+        raise ValueError(f"A row after row {rows_read} does not fit the column types of the first {chunksize} "
+                         f"rows ({e}); give the column a type in the mapping, e.g. type: string") from e
+
+def _with_types(df, types):
+    """df with some columns cast; DataFrame.astype with a dict is many times slower for a few columns."""
+    for col, kind in types.items():
+        df[col] = df[col].astype(kind)
+    return df
+
+def _chunk_types(df):
+    """
+    dtype for each column in every chunk of a file, from the types of its
+    first chunk: integers are Int64 (a later chunk may hold blanks), booleans
+    boolean (read_csv gives object for booleans with blanks), other numbers
+    float64 or uint64, and anything else str.
+    """
+    types = {}
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype) or \
+                (dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) == 'boolean'):
+            types[col] = 'boolean'
+        elif pd.api.types.is_signed_integer_dtype(dtype):
+            types[col] = 'Int64'
+        elif pd.api.types.is_unsigned_integer_dtype(dtype):
+            types[col] = 'uint64'
+        elif pd.api.types.is_float_dtype(dtype):
+            types[col] = 'float64'
+        else:
+            types[col] = 'str'
+    return types
+
+def _text_hints_only(options):
+    """The same options without numeric dtype hints."""
+    dtype = {col: kind for col, kind in (options.get('dtype') or {}).items() if kind == 'str'}
+    return {**options, 'dtype': dtype or None}
+
+def parse_excel_file(file_path: str, plan=None) -> pd.DataFrame:
+    """
+    Parse the sheets the mapping plan's `sheet` setting names (the first sheet
+    without one) with the streaming reader in analysis.excel_stream. Ignored
+    columns are dropped while rows are read, and several sheets are read in
+    parallel and stacked.
+    """
+    try:
+        return read_excel(file_path, excel_sheets(plan), skipped_columns(plan))
+    except Exception as e:
+        raise Exception(f"Failed to parse Excel file: {str(e)}")
 
 def parse_xml_file(file_path: str) -> pd.DataFrame:
     """
-    Parse XML files - simplified version for your products structure.
+    Parse an XML file with the streaming reader in analysis.xml_stream: the
+    repeating record element is detected from the start of the file and
+    records are read one by one, never as a whole document tree.
     """
     try:
-        # Try pandas first (this should work for your XML)
-        df = pd.read_xml(file_path)
-        print(f"Successfully parsed XML with pandas, shape: {df.shape}")
+        df = read_xml(file_path)
+        logger.debug("Parsed XML, shape: %s", df.shape, extra={"rows": len(df)})
         return df
-    except Exception as pandas_error:
-        print(f"Pandas failed: {pandas_error}")
+    except Exception as e:
+        raise Exception(f"Failed to parse XML file: {str(e)}")
+
+def iter_file_chunks(file_path: str, filename: str, chunksize: int = 100_000, plan=None):
+    """
+    Stream a file as DataFrame chunks of at most `chunksize` rows so large
+    files can be processed without loading them whole. With a mapping plan,
+    CSV chunks get the same dtype hints and column selection as
+    parse_csv_file, and Excel chunks the same sheets and column selection as
+    parse_excel_file (sheets are read one after the other). All chunks of a
+    CSV file have the same column types (see _iter_csv_chunks).
+    """
+    if filename.lower().endswith('.xml'):
+        yield from iter_xml_chunks(file_path, chunksize)
+        return
+    if filename.lower().endswith(('.xls', '.xlsx')):
+        for sheet in excel_sheets(plan):
+            yield from iter_excel_chunks(file_path, sheet, chunksize, skipped_columns(plan))
+        return
+    if filename.lower().endswith('.csv'):
+        encoding = detect_file_encoding(file_path)
         try:
-            # Manual parsing as fallback
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            
-            records = []
-            for product in root.findall('product'):
-                record = {}
-                for field in product:
-                    record[field.tag] = field.text
-                records.append(record)
-            
-            df = pd.DataFrame(records)
-            print(f"Successfully parsed XML manually, shape: {df.shape}")
-            return df
-            
-        except Exception as manual_error:
-            raise Exception(f"Both parsing methods failed. Pandas: {pandas_error}, Manual: {manual_error}")
-
-def get_file_columns_preview(file_path: str, filename: str, max_rows: int = 5) -> dict:
+            options = csv_read_options(file_path, encoding, plan)
+        except UnicodeDecodeError:
+            encoding = 'latin-1'
+            options = csv_read_options(file_path, encoding, plan)
+
+        rows_read = 0
+        try:
+            for chunk in _iter_csv_chunks(file_path, chunksize, encoding, options):
+                rows_read += len(chunk)
+                yield chunk
+        except UnicodeDecodeError:
+            if rows_read:
+                raise
+            # The sample looked like UTF-8 but the first chunk is not
+            for chunk in _iter_csv_chunks(file_path, chunksize, 'latin-1', options):
+                yield chunk
+        except (ValueError, TypeError) as e:
+            if rows_read or not options.get('dtype'):
+                raise
+            # A value of the first chunk does not fit its numeric hint: read
+            # the file with text hints only, like parse_csv_file
+            logger.info("Column types from the mapping do not fit %s, inferring numeric columns: %s", file_path, e)
+            yield from _iter_csv_chunks(file_path, chunksize, encoding, _text_hints_only(options))
+    else:
+        raise ValueError(f"Unsupported file type: {filename}")
+
+def read_file_sample(file_path: str, filename: str, max_rows: int, plan=None) -> pd.DataFrame:
+    """
+    The first `max_rows` rows of a file, parsed the way iter_file_chunks
+    parses them (with the plan's dtype hints, column selection and sheets).
+    Only as much of the file as those rows need is read.
+    """
+    return next(iter_file_chunks(file_path, filename, max_rows, plan), pd.DataFrame())
+
+def read_csv_columns(file_path: str, columns: list, max_rows: int, plan=None) -> pd.DataFrame:
+    """
+    Only `columns` (header names) of the first `max_rows` rows of a CSV file.
+    The other columns are tokenized but never converted, which makes this
+    several times faster than reading whole rows. Text dtype hints of the plan
+    apply; numeric columns are inferred (see _text_hints_only).
+    """
+    encoding = detect_file_encoding(file_path)
+    try:
+        options = _text_hints_only(csv_read_options(file_path, encoding, plan))
+    except UnicodeDecodeError:
+        encoding = 'latin-1'
+        options = _text_hints_only(csv_read_options(file_path, encoding, plan))
+    dtype = {col: kind for col, kind in (options.get('dtype') or {}).items() if col in columns}
+
+    try:
+        return pd.read_csv(file_path, usecols=columns, nrows=max_rows, encoding=encoding, dtype=dtype or None)
+    except UnicodeDecodeError:
+        return pd.read_csv(file_path, usecols=columns, nrows=max_rows, encoding='latin-1', dtype=dtype or None)
+
+def get_file_columns_preview(file_path: str, filename: str, max_rows: int = 5, plan=None) -> dict:
     """
     Get a preview of file columns and sample data for large files.
     """
     try:
-        if filename.lower().endswith('.csv'):
-            df_preview = pd.read_csv(file_path, nrows=max_rows)
-        elif filename.lower().endswith(('.xls', '.xlsx')):
-            df_preview = pd.read_excel(file_path, nrows=max_rows)
-        elif filename.lower().endswith('.xml'):
-            df_preview = parse_xml_preview(file_path, max_rows)
-        else:
-            raise ValueError(f"Unsupported file type: {filename}")
-        
+        df_preview = read_file_sample(file_path, filename, max_rows, plan)
         return {
             "columns": df_preview.columns.tolist(),
             "sample_data": df_preview.to_dict('records'),
@@ -140,45 +441,31 @@ def get_file_columns_preview(file_path: str, filename: str, max_rows: int = 5) -
 
 def parse_xml_preview(file_path: str, max_rows: int = 5) -> pd.DataFrame:
     """
-    Parse only the first few XML records for performance.
+    Parse only the first few XML records; the rest of the file is not read.
     """
-    try:
-        return pd.read_xml(file_path, nrows=max_rows)
-    except:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        tags = [child.tag for child in root]
-        most_common_tag = Counter(tags).most_common(1)[0][0]
-        
-        rows = []
-        for i, record in enumerate(root.findall(most_common_tag)):
-            if i >= max_rows:
-                break
-            row = {c.tag: c.text for c in record}
-            rows.append(row)
-        
-        return pd.DataFrame(rows)
+    return next(iter_xml_chunks(file_path, max_rows), pd.DataFrame())
 
 def detect_file_encoding(file_path: str) -> str:
     """
-    Detect file encoding using simple heuristics.
+    Detect file encoding from the first ENCODING_SAMPLE_BYTES: UTF-8 with a
+    byte order mark is utf-8-sig, valid UTF-8 is utf-8, anything else is read
+    as latin-1 (which accepts every byte).
     """
     try:
         with open(file_path, 'rb') as f:
-            raw_data = f.read(1024)  # Read first 1KB
-            
-        try:
-            raw_data.decode('utf-8')
-            return 'utf-8'
-        except UnicodeDecodeError:
-            try:
-                raw_data.decode('latin-1')
-                return 'latin-1'
-            except UnicodeDecodeError:
-                return 'utf-8-sig'  # UTF-8 with BOM
+            raw_data = f.read(ENCODING_SAMPLE_BYTES)
     except Exception:
         return 'utf-8'  # Default fallback
 
+    if raw_data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # final=False tolerates a multi-byte character cut off by the sample
+        codecs.getincrementaldecoder('utf-8')().decode(raw_data, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
 def optimize_dataframe_memory(df: pd.DataFrame) -> pd.DataFrame:
     """
     Optimize DataFrame memory usage for large files.
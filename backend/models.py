@@ -1,7 +1,12 @@
+import logging
 from db import db
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from sqlalchemy import insert
+from analysis.exception_table import ExceptionTable
+
+logger = logging.getLogger(__name__)
 
 class MatchingData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -29,6 +34,15 @@ class ExceptionRecord (db.Model):
     old_value = db.Column(db.String(256))
     new_value = db.Column(db.String(256))
 
+class StageTiming(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    matching_data_id = db.Column(db.Integer, db.ForeignKey('matching_data.id'), nullable=False)
+    stage = db.Column(db.String(128))
+    calls = db.Column(db.Integer)
+    wall_ms = db.Column(db.Float)
+    cpu_ms = db.Column(db.Float)
+    peak_memory_mb = db.Column(db.Float)
+
 def check_existing_data(system_name, primary_key_used, match_rate, num_exceptions):
     """
     Check if similar data already exists in the database.
@@ -56,14 +70,16 @@ def save_to_db(result):
     match_rate = float(result.get("match_pct"))
     system_name = result.get("system_name")
     exceptions_list = result.get("exceptions", [])
-    num_exceptions = len(exceptions_list)
+    # Summary-only runs carry a count but no exception rows
+    num_exceptions = result.get("num_exceptions", len(exceptions_list))
     primary_key_used = ','.join(result.get("primary_key", []))
 
     # Check if this exact data already exists
     existing_record = check_existing_data(system_name, primary_key_used, match_rate, num_exceptions)
     
     if existing_record:
-        print(f"Duplicate data detected for {system_name}. Skipping database save.")
+        logger.info("Duplicate data detected for %s. Skipping database save.", system_name,
+                    extra={"system_name": system_name, "analysis_id": existing_record.id})
         return existing_record.to_dict()
 
     # Only save if it's new data
@@ -77,6 +93,19 @@ def save_to_db(result):
     db.session.add(matching_data)
     db.session.flush()
 
+    if isinstance(exceptions_list, ExceptionTable):
+        # One executemany for the whole table instead of an ORM object per row
+        frame = exceptions_list.frame
+        if len(frame):
+            rows = pd.DataFrame({
+                "matching_data_id": matching_data.id,
+                "name": frame["field"].map(str),
+                "old_value": frame["old"].map(str),
+                "new_value": frame["new"].map(str),
+            })
+            db.session.execute(insert(ExceptionRecord), rows.to_dict("records"))
+        exceptions_list = []
+
     for exc in exceptions_list:
         name = str(exc.get("field", ""))
         old_value = str(exc.get("old", ""))
@@ -90,9 +119,23 @@ def save_to_db(result):
         db.session.add(exception)
 
     db.session.commit()
-    print(f"New data saved for {system_name}")
+    logger.info("New data saved for %s", system_name, extra={
+        "system_name": system_name, "analysis_id": matching_data.id, "rows": num_exceptions,
+    })
     return matching_data.to_dict()
 
+def save_stage_timings(matching_data_id, timings):
+    """
+    Store the per-stage timings of a run with its MatchingData row. A rerun
+    that matched an existing row replaces that row's timings.
+    """
+    StageTiming.query.filter_by(matching_data_id=matching_data_id).delete()
+    if timings:
+        db.session.execute(insert(StageTiming), [
+            {"matching_data_id": matching_data_id, **timing} for timing in timings
+        ])
+    db.session.commit()
+
 def get_historic_data(system_name, primary_key_used=None):
     query = MatchingData.query.filter_by(system_name=system_name)
     
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Synthetic old/new file pairs shaped like sample_data/sample_old.csv.
+
+    python benchmarks/generate.py --rows 1000000 --out /tmp/recon_1m
+
+writes sample_old.csv and sample_new.csv to the output directory. The
+same pair can be built in memory with generate_pair().
+"""
+
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ['Equity', 'Bond', 'ETF', 'Commodity', 'Cash']
+STATUSES = ['Active', 'Inactive']
+SUFFIXES = ['Corp', 'LLC', 'Inc', 'Co', 'Ltd']
+
+def generate_pair(rows, extra_columns=0, mismatch_rate=0.05, null_rate=0.01,
+                  duplicate_rate=0.0, cardinality=1000, seed=0):
+    """
+    Build an (old, new) pair of DataFrames with `rows` rows each.
+
+    - extra_columns: additional free-text columns (Extra1, Extra2, ...)
+    - mismatch_rate: share of rows whose value differs in each compared column
+    - null_rate: share of cells blanked, independently in old and new
+    - duplicate_rate: share of rows that repeat another row's ID
+    - cardinality: number of distinct values of the free-text columns
+
+    Changes are chosen to exceed the tolerances in analysis/mapping.yaml, so
+    every changed cell is an exception under the default mapping.
+    """
+    rng = np.random.default_rng(seed)
+
+    def words(prefix, suffixes=None):
+        vocab = np.array([
+            f"{prefix} {i:05d}" + (f" {suffixes[i % len(suffixes)]}" if suffixes else "")
+            for i in range(max(int(cardinality), 2))
+        ], dtype=object)
+        return vocab, rng.integers(0, len(vocab), rows)
+
+    names, name_codes = words('Company', SUFFIXES)
+    descriptions, description_codes = words('Description')
+    locations, location_codes = words('City')
+
+    old = pd.DataFrame({
+        'ID': np.arange(1, rows + 1),
+        'Name': names[name_codes],
+        'Price': np.round(rng.uniform(1, 1000, rows), 2),
+        'Date': (np.datetime64('2025-01-01') + rng.integers(0, 365, rows).astype('timedelta64[D]')).astype(str),
+        'Quantity': rng.integers(1, 100, rows),
+        'Category': np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), rows)],
+        'Description': descriptions[description_codes],
+        'Vendor': 'OldSys',
+        'Location': locations[location_codes],
+        'Status': np.array(STATUSES, dtype=object)[rng.integers(0, len(STATUSES), rows)],
+    })
+    for i in range(1, extra_columns + 1):
+        vocab, codes = words(f'Extra{i}')
+        old[f'Extra{i}'] = vocab[codes]
+
+    if duplicate_rate:
+        repeated = rng.random(rows) < duplicate_rate
+        old.loc[repeated, 'ID'] = rng.integers(1, rows + 1, int(repeated.sum()))
+
+    new = old.copy()
+    new['Vendor'] = 'NewSys'
+
+    def changed():
+        return rng.random(rows) < mismatch_rate
+
+    mask = changed()
+    new.loc[mask, 'Price'] = np.round(new.loc[mask, 'Price'] + 1.5, 2)
+    mask = changed()
+    new.loc[mask, 'Quantity'] = new.loc[mask, 'Quantity'] + 1
+    mask = changed()
+    new.loc[mask, 'Date'] = (new.loc[mask, 'Date'].to_numpy().astype('datetime64[D]') + 1).astype(str)
+    mask = changed()
+    new.loc[mask, 'Category'] = np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), int(mask.sum()))]
+    mask = changed()
+    new.loc[mask, 'Status'] = np.where(new.loc[mask, 'Status'] == 'Active', 'Inactive', 'Active')
+    # Free text moves to another vocabulary entry, far beyond the fuzzy thresholds
+    for col, vocab, codes in (('Name', names, name_codes),
+                              ('Description', descriptions, description_codes),
+                              ('Location', locations, location_codes)):
+        mask = changed()
+        new.loc[mask, col] = vocab[(codes[mask] + len(vocab) // 2) % len(vocab)]
+    for i in range(1, extra_columns + 1):
+        mask = changed()
+        new.loc[mask, f'Extra{i}'] = new.loc[mask, f'Extra{i}'] + ' changed'
+
+    if null_rate:
+        for df in (old, new):
+            for col in df.columns[1:]:
+                df[col] = df[col].mask(rng.random(rows) < null_rate)
+
+    # Exports rarely agree on row order
+    new = new.iloc[rng.permutation(rows)].reset_index(drop=True)
+    return old, new
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--extra-columns', type=int, default=0)
+    parser.add_argument('--mismatch-rate', type=float, default=0.05)
+    parser.add_argument('--null-rate', type=float, default=0.01)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--cardinality', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help="directory for sample_old.csv and sample_new.csv")
+    args = parser.parse_args()
+
+    old, new = generate_pair(args.rows, args.extra_columns, args.mismatch_rate, args.null_rate,
+                             args.duplicate_rate, args.cardinality, args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    old.to_csv(os.path.join(args.out, 'sample_old.csv'), index=False)
+    new.to_csv(os.path.join(args.out, 'sample_new.csv'), index=False)
+    print(f"Wrote {len(old)} rows per file to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Load test for the Flask API.
+
+Starts the backend on a scratch SQLite database (or targets --url), seeds
+it with one upload and then drives /upload, /history, /analysis and
+/api/get_filtered_exceptions from --concurrency client threads for
+--duration seconds, with files from generate.py. Reports per endpoint the
+request count, throughput, error rate and p50/p95/p99 latency, plus the
+server's resident memory. The started server measures stage memory with
+--stage-memory (rss by default); under tracemalloc latencies are several
+times higher and do not reflect production.
+
+    python benchmarks/load_test.py --concurrency 8 --duration 60 --rows 10000
+    python benchmarks/load_test.py --url http://localhost:5000 --server-pid 1234
+
+The request mix is set with --mix as endpoint=weight pairs, e.g.
+upload=1,history=4,analysis=4,filtered=2.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from generate import generate_pair
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = 'upload=1,history=4,analysis=4,filtered=2'
+ENDPOINTS = ('upload', 'history', 'analysis', 'filtered')
+
+def start_server(port, database_uri, log_level, stage_memory):
+    """Run the backend with the threaded development server; returns the process."""
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=database_uri, LOG_LEVEL=log_level,
+               STAGE_MEMORY_TRACKING=stage_memory)
+    return subprocess.Popen(
+        [sys.executable, '-c', f"from app import app; app.run(port={port}, threaded=True)"],
+        cwd=os.path.join(ROOT, 'backend'), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+def wait_until_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/db_check", timeout=2).ok:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+def rss_mb(pid):
+    """Resident set size of a process in MB, read from /proc (Linux only)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+class RssSampler(threading.Thread):
+    """Samples the server's RSS every `interval` seconds until stopped."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            value = rss_mb(self.pid)
+            if value is not None:
+                self.samples.append(value)
+            self.stopped.wait(self.interval)
+
+def write_pairs(directory, count, rows, seed):
+    """Write `count` distinct old/new CSV pairs; distinct names keep uploads from being deduplicated."""
+    pairs = []
+    for i in range(count):
+        old, new = generate_pair(rows, seed=seed + i)
+        old_path = os.path.join(directory, f'load_{i}_old.csv')
+        new_path = os.path.join(directory, f'load_{i}_new.csv')
+        old.to_csv(old_path, index=False)
+        new.to_csv(new_path, index=False)
+        pairs.append((old_path, new_path))
+    return pairs
+
+class Workload:
+    """Issues one request of a given kind and remembers uploads for the read endpoints."""
+
+    def __init__(self, url, pairs):
+        self.url = url
+        self.pairs = itertools.cycle(pairs)
+        self.pairs_lock = threading.Lock()
+        self.analyses = []
+        self.session = threading.local()
+
+    def _http(self):
+        if not hasattr(self.session, 'value'):
+            self.session.value = requests.Session()
+        return self.session.value
+
+    def upload(self):
+        with self.pairs_lock:
+            old_path, new_path = next(self.pairs)
+        with open(old_path, 'rb') as old, open(new_path, 'rb') as new:
+            files = {
+                'old': (os.path.basename(old_path), old, 'text/csv'),
+                'new': (os.path.basename(new_path), new, 'text/csv'),
+            }
+            response = self._http().post(f"{self.url}/upload", files=files, timeout=600)
+        if response.ok:
+            body = response.json()
+            self.analyses.append({
+                'system': body['system_name'],
+                'primary_key_used': ','.join(body['primary_key']),
+                'date': body['date'][:10],
+                'analysis_id': body['analysis_id'],
+            })
+        return response
+
+    def history(self):
+        analysis = random.choice(self.analyses)
+        return self._http().get(f"{self.url}/history", timeout=600, params={
+            'system': analysis['system'], 'primary_key_used': analysis['primary_key_used'],
+        })
+
+    def analysis(self):
+        analysis = random.choice(self.analyses)
+        return self._http().get(f"{self.url}/analysis", timeout=600, params={
+            'system': analysis['system'], 'primary_key_used': analysis['primary_key_used'],
+            'date': analysis['date'],
+        })
+
+    def filtered(self):
+        analysis = random.choice(self.analyses)
+        return self._http().get(f"{self.url}/api/get_filtered_exceptions/{analysis['analysis_id']}", timeout=600)
+
+def run_load(workload, mix, concurrency, duration):
+    """Drive the workload from `concurrency` threads for `duration` seconds. Returns {endpoint: [(seconds, ok)]}."""
+    kinds = [kind for kind, weight in mix.items() for _ in range(weight)]
+    results = {kind: [] for kind in mix}
+    results_lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < deadline:
+            kind = rng.choice(kinds)
+            started = time.perf_counter()
+            try:
+                ok = getattr(workload, kind)().ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with results_lock:
+                results[kind].append((elapsed, ok))
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return results
+
+def summarize(results, duration, rss_samples):
+    report = {'duration_s': duration, 'endpoints': {}}
+    for kind, samples in results.items():
+        if not samples:
+            continue
+        latencies = np.array([seconds for seconds, _ in samples]) * 1000
+        errors = sum(1 for _, ok in samples if not ok)
+        report['endpoints'][kind] = {
+            'requests': len(samples),
+            'throughput_rps': round(len(samples) / duration, 2),
+            'error_rate': round(errors / len(samples), 4),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 1),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 1),
+        }
+    total = sum(len(samples) for samples in results.values())
+    report['throughput_rps'] = round(total / duration, 2)
+    if rss_samples:
+        report['server_rss_mb'] = {
+            'start': round(rss_samples[0], 1),
+            'peak': round(max(rss_samples), 1),
+            'end': round(rss_samples[-1], 1),
+        }
+    return report
+
+def print_report(report):
+    print(f"\n{'endpoint':<12}{'requests':>10}{'req/s':>10}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind, figures in report['endpoints'].items():
+        print(f"{kind:<12}{figures['requests']:>10}{figures['throughput_rps']:>10.2f}{figures['error_rate']:>9.1%}"
+              f"{figures['p50_ms']:>10.1f}{figures['p95_ms']:>10.1f}{figures['p99_ms']:>10.1f}")
+    print(f"\nTotal throughput: {report['throughput_rps']:.2f} req/s")
+    print(f"Stage memory tracking: {report.get('stage_memory_tracking') or 'as configured on the server'}")
+    if 'server_rss_mb' in report:
+        rss = report['server_rss_mb']
+        print(f"Server RSS: {rss['start']:.0f} MB at start, {rss['peak']:.0f} MB peak, {rss['end']:.0f} MB at end")
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        if kind.strip() not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {kind}. Allowed: {', '.join(ENDPOINTS)}")
+        if int(weight or 1) > 0:
+            mix[kind.strip()] = int(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="target an already running server instead of starting one")
+    parser.add_argument('--server-pid', type=int, help="PID of the --url server, for RSS sampling")
+    parser.add_argument('--port', type=int, default=5057)
+    parser.add_argument('--database-uri', help="database for the started server (default: scratch SQLite file)")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=30, help="seconds of load after seeding")
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--rows', type=int, default=10_000, help="rows per generated file")
+    parser.add_argument('--files', type=int, default=4, help="distinct file pairs to cycle through")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log-level', default='WARNING', help="LOG_LEVEL of the started server")
+    parser.add_argument('--stage-memory', default='rss', choices=('rss', 'off', 'tracemalloc'),
+                        help="STAGE_MEMORY_TRACKING of the started server; tracemalloc slows every request "
+                             "several times over while an upload runs")
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory(prefix='recon_load_') as tmp:
+        server = None
+        url, pid = args.url, args.server_pid
+        if not url:
+            database_uri = args.database_uri or f"sqlite:///{os.path.join(tmp, 'load.db')}"
+            server = start_server(args.port, database_uri, args.log_level, args.stage_memory)
+            url, pid = f"http://127.0.0.1:{args.port}", server.pid
+        try:
+            print(f"Generating {args.files} file pair(s) of {args.rows} rows")
+            pairs = write_pairs(tmp, args.files, args.rows, args.seed)
+            wait_until_ready(url)
+
+            workload = Workload(url, pairs)
+            seeded = workload.upload()
+            if not seeded.ok:
+                raise SystemExit(f"Seeding upload failed with {seeded.status_code}: {seeded.text[:500]}")
+
+            sampler = RssSampler(pid) if pid else None
+            if sampler:
+                sampler.start()
+            print(f"Running {args.concurrency} client(s) for {args.duration:.0f}s with mix {mix}")
+            started = time.monotonic()
+            results = run_load(workload, mix, args.concurrency, args.duration)
+            elapsed = time.monotonic() - started
+            if sampler:
+                sampler.stopped.set()
+                sampler.join()
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    report = summarize(results, elapsed, sampler.samples if sampler else [])
+    report.update({'concurrency': args.concurrency, 'rows': args.rows, 'mix': mix,
+                   # Unknown for a --url server: it runs with its own environment
+                   'stage_memory_tracking': None if args.url else args.stage_memory})
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
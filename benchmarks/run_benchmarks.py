@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the reconciliation pipeline.
+
+For each size, a synthetic pair (see generate.py) is written to CSV and run
+through the same stages as /upload: parse_uploaded_file, etl.normalize,
+run_compare (timed as a whole and by its merge/prefilter/compare:<column>
+stages), add_summary_to_exceptions and save_to_db into a scratch SQLite
+database. Wall time, CPU time, peak memory and rows per second are
+recorded per stage. Every run is a fresh process, so a stage's memory
+figure does not depend on the data generation or on the sizes run before
+it. Times always come from runs without tracemalloc, which would inflate
+them several times over; --memory tracemalloc adds a traced run for exact
+per-stage peaks. run_compare:no_prefilter times the
+same comparison with the prefilter turned off, which shows what the
+prefilter saves; it is largest at low mismatch rates, e.g.
+--mismatch-rate 0.001.
+
+    python benchmarks/run_benchmarks.py                      # 10k and 1M rows
+    python benchmarks/run_benchmarks.py --sizes 10k,1M,10M
+    python benchmarks/run_benchmarks.py --update-baseline    # record a new baseline
+
+Results are compared with the JSON baseline (benchmarks/baseline.json by
+default) and the script exits with status 1 when a stage got slower or
+used more memory than the baseline by more than --threshold. Baselines
+are machine specific: record one on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from db import db
+from models import save_to_db
+from helpers import parse_uploaded_file
+from analysis import etl, mapping
+from analysis.compare import run_compare
+from analysis.exception_builder import add_summary_to_exceptions
+from analysis.instrumentation import StageTimings, stage
+from generate import generate_pair
+
+DEFAULT_SIZES = '10k,1M'
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# A stage regresses when it is this much slower (or larger) than the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and the difference is above the noise floor for short or small stages
+MIN_REGRESSION_MS = 20
+MIN_REGRESSION_MB = 5
+
+def parse_size(label):
+    """'10k' -> 10000, '1M' -> 1000000, '2500' -> 2500."""
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    suffix = label[-1].lower()
+    if suffix in multipliers:
+        return int(float(label[:-1]) * multipliers[suffix])
+    return int(label)
+
+def run_size(rows, repeat, memory, generator_options):
+    """
+    Run every stage `repeat` times on a pair of `rows` rows and keep the
+    fastest run of each stage. Returns {stage: figures}.
+    """
+    with tempfile.TemporaryDirectory(prefix='recon_bench_') as tmp:
+        df_old, df_new = generate_pair(rows, **generator_options)
+        df_old.to_csv(os.path.join(tmp, 'sample_old.csv'), index=False)
+        df_new.to_csv(os.path.join(tmp, 'sample_new.csv'), index=False)
+        del df_old, df_new
+
+        # tracemalloc would slow the timed stages several times over, so
+        # times always come from untraced runs; with --memory tracemalloc the
+        # peaks come from one more, traced run
+        traced = memory == 'tracemalloc'
+        best = {}
+        for run in range(repeat):
+            for timing in _run_in_fresh_process(tmp, 'off' if traced else memory, f"bench_{rows}_{run}"):
+                name = timing.pop('stage')
+                if name not in best or timing['wall_ms'] < best[name]['wall_ms']:
+                    best[name] = timing
+        if traced:
+            for timing in _run_in_fresh_process(tmp, memory, f"bench_{rows}_traced"):
+                best[timing['stage']]['peak_memory_mb'] = timing['peak_memory_mb']
+
+        for figures in best.values():
+            seconds = figures['wall_ms'] / 1000 / figures['calls']
+            figures['rows_per_s'] = round(rows / seconds) if seconds else None
+        return best
+
+def _run_in_fresh_process(tmp, memory, system_name):
+    """
+    _run_stages in a new process. Memory freed earlier in a process stays
+    resident for reuse, which would hide later stages' allocations from rss
+    figures; spawn rather than fork, so the child starts without the
+    parent's pages.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_run_stages, tmp, memory, system_name).result()
+
+def _run_stages(tmp, memory, system_name):
+    """
+    One pass through the pipeline stages on the pair in directory `tmp`,
+    saving into a SQLite database there; returns StageTimings.to_list() figures.
+    """
+    mapping_cfg = mapping.load_mapping(os.path.join(ROOT, 'backend', 'analysis', 'mapping.yaml'))
+    old_path = os.path.join(tmp, 'sample_old.csv')
+    new_path = os.path.join(tmp, 'sample_new.csv')
+    app = Flask('benchmarks')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    db.init_app(app)
+
+    timings = StageTimings(memory)
+    with app.app_context(), timings.activate():
+        db.create_all()
+        with stage('parse_uploaded_file'):
+            df_old = parse_uploaded_file(old_path, 'sample_old.csv', mapping_cfg)
+            df_new = parse_uploaded_file(new_path, 'sample_new.csv', mapping_cfg)
+        with stage('etl.normalize'):
+            df_old = etl.normalize(df_old, mapping_cfg)
+            df_new = etl.normalize(df_new, mapping_cfg)
+        with stage('run_compare'):
+            result = run_compare(df_old, df_new, list(mapping_cfg['pk']), mapping_cfg)
+        # Recorded apart so its merge and compare:<column> stages do
+        # not add up with the ones of the run above
+        reference = StageTimings(memory)
+        with reference.activate(), reference.stage('run_compare:no_prefilter'):
+            run_compare(df_old, df_new, list(mapping_cfg['pk']), mapping_cfg.with_settings(prefilter=False))
+        with stage('add_summary_to_exceptions'):
+            exceptions = add_summary_to_exceptions(result['exceptions'], mapping_cfg)
+        with stage('save_to_db'):
+            # A distinct system name per run keeps save_to_db from
+            # skipping the insert as a duplicate of the previous run
+            save_to_db({
+                "system_name": system_name,
+                "date": pd.Timestamp.now(),
+                "match_pct": result["match_pct"],
+                "exceptions": exceptions,
+                "primary_key": list(mapping_cfg['pk']),
+            })
+        db.session.remove()
+    return timings.to_list() + reference.to_list()
+
+def compare_to_baseline(results, baseline, threshold):
+    """List of regression messages for stages present in both results and baseline."""
+    regressions = []
+    for size, current in results.items():
+        previous = baseline.get('sizes', {}).get(size)
+        if not previous:
+            continue
+        for name, figures in current['stages'].items():
+            before = previous['stages'].get(name)
+            if not before:
+                continue
+            wall, base_wall = figures['wall_ms'], before['wall_ms']
+            if wall > base_wall * (1 + threshold) and wall - base_wall > MIN_REGRESSION_MS:
+                regressions.append(f"{size} {name}: {wall:.0f} ms vs {base_wall:.0f} ms baseline")
+            peak, base_peak = figures.get('peak_memory_mb'), before.get('peak_memory_mb')
+            if peak is not None and base_peak is not None and \
+                    peak > base_peak * (1 + threshold) and peak - base_peak > MIN_REGRESSION_MB:
+                regressions.append(f"{size} {name}: {peak:.0f} MB peak vs {base_peak:.0f} MB baseline")
+    return regressions
+
+def print_results(results):
+    for size, current in results.items():
+        print(f"\n{size} rows")
+        print(f"  {'stage':<28}{'wall ms':>12}{'cpu ms':>12}{'peak MB':>10}{'rows/s':>14}")
+        for name, figures in current['stages'].items():
+            peak = figures['peak_memory_mb']
+            print(f"  {name:<28}{figures['wall_ms']:>12.1f}{figures['cpu_ms']:>12.1f}"
+                  f"{'-' if peak is None else f'{peak:.1f}':>10}{figures['rows_per_s'] or 0:>14,}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="comma-separated row counts, e.g. 10k,1M,10M")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per size; the fastest run of each stage is kept")
+    parser.add_argument('--memory', default='rss',
+                        help="peak memory measurement: rss, off or tracemalloc (exact per-stage peaks from an extra "
+                             "traced run; times still come from untraced runs)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown or memory growth as a fraction of the baseline")
+    parser.add_argument('--update-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--extra-columns', type=int, default=0)
+    parser.add_argument('--mismatch-rate', type=float, default=0.05)
+    parser.add_argument('--null-rate', type=float, default=0.01)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0)
+    parser.add_argument('--cardinality', type=int, default=1000)
+    args = parser.parse_args()
+
+    generator_options = {
+        'extra_columns': args.extra_columns,
+        'mismatch_rate': args.mismatch_rate,
+        'null_rate': args.null_rate,
+        'duplicate_rate': args.duplicate_rate,
+        'cardinality': args.cardinality,
+    }
+    results = {}
+    for label in args.sizes.split(','):
+        rows = parse_size(label.strip())
+        started = time.perf_counter()
+        results[label.strip()] = {'rows': rows, 'stages': run_size(rows, args.repeat, args.memory, generator_options)}
+        print(f"{label.strip()}: done in {time.perf_counter() - started:.1f}s")
+    print_results(results)
+
+    if args.update_baseline:
+        baseline = {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'generator': generator_options,
+            'memory': args.memory,
+            'sizes': results,
+        }
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('generator') != generator_options or baseline.get('memory') != args.memory:
+        print("\nWarning: baseline was recorded with different generator or memory options")
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} of the baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 from utils.validators import get_system_info
-from utils.api_client import upload_files_for_comparison, reject_exceptions, get_rejected_exceptions, recalculate_match_rate
+from utils.api_client import upload_files_for_comparison, compare_uploaded_dataset, detect_primary_key_for_files, reject_exceptions, get_rejected_exceptions, recalculate_match_rate
 
 def render_file_upload_section(map_path):
     """Render the file upload and comparison section."""
@@ -49,23 +49,25 @@ def render_file_upload_section(map_path):
     # Clear session state if files have changed
     if st.session_state.get('current_files') != file_key:
         # Clear all previous state when new files are uploaded
-        for key in ['auto_pk', 'result', 'primary_key', 'current_files']:
+        for key in ['auto_pk', 'auto_pk_check', 'available_columns', 'result', 'primary_key', 'current_files']:
             if key in st.session_state:
                 del st.session_state[key]
         st.session_state['current_files'] = file_key
 
-    # Auto-detect PK only once per file upload
+    # Auto-detect PK only once per file upload. /detect_pk only samples the
+    # files, so the key selection shows up before the comparison has run
     if 'auto_pk' not in st.session_state:
-        result = upload_files_for_comparison(old_upload, new_upload, map_path)
-        if result:
-            st.session_state['auto_pk'] = result.get("primary_key", [])
-            st.session_state['result'] = result
-            st.session_state['primary_key'] = st.session_state['auto_pk']
-            available_columns = result.get("available_columns", result.get("primary_key", []))
-        else:
-            st.session_state['auto_pk'] = []
-            available_columns = []
-    else:
+        detected = detect_primary_key_for_files(old_upload, new_upload) or {}
+        st.session_state['auto_pk'] = detected.get("primary_key", [])
+        if detected:
+            # How far the suggestion was checked; it may rest on a sample only
+            st.session_state['auto_pk_check'] = {"exact": detected.get("exact", False),
+                                                 "verified_rows": detected.get("verified_rows")}
+        st.session_state['available_columns'] = detected.get("available_columns", [])
+        st.session_state['primary_key'] = st.session_state['auto_pk']
+
+    available_columns = st.session_state.get('available_columns')
+    if not available_columns:
         # Get available columns from existing result
         result = st.session_state.get('result', {})
         available_columns = result.get("available_columns", result.get("primary_key", []))
@@ -79,6 +81,26 @@ def render_file_upload_section(map_path):
             key='primary_key',
             on_change=lambda: _run_comparison_with_pk(old_upload, new_upload, map_path)
         )
+        check = st.session_state.get('auto_pk_check')
+        if check and not check["exact"] and st.session_state.get('primary_key') == st.session_state.get('auto_pk'):
+            rows = check["verified_rows"]
+            if rows:
+                st.sidebar.caption(f"⚠️ Suggested key is unique in the first {rows['old']:,} old and "
+                                   f"{rows['new']:,} new rows only; later rows were not checked.")
+            else:
+                st.sidebar.caption("⚠️ No unique key found in the sampled rows; the suggested key is a best guess.")
+
+    # First comparison of these files, with the detected key
+    if 'result' not in st.session_state:
+        result = upload_files_for_comparison(old_upload, new_upload, map_path, st.session_state.get('auto_pk'))
+        if not result:
+            return
+        st.session_state['result'] = result
+        if not st.session_state.get('auto_pk'):
+            # Detection failed; the upload detected the key itself
+            st.session_state['auto_pk'] = result.get("primary_key", [])
+            st.session_state['primary_key'] = st.session_state['auto_pk']
+            st.rerun()
 
     # Show results if available
     if 'result' in st.session_state:
@@ -87,7 +109,14 @@ def render_file_upload_section(map_path):
 def _run_comparison_with_pk(old_upload, new_upload, map_path):
     """Re-run comparison with selected primary keys."""
     pk = st.session_state.get('primary_key')
-    result = upload_files_for_comparison(old_upload, new_upload, map_path, pk)
+    # The backend keeps the uploaded pair under a dataset handle, so only the
+    # comparison runs again; the files are re-sent only once the handle expired
+    result = None
+    dataset = st.session_state.get('result', {}).get('dataset')
+    if dataset:
+        result = compare_uploaded_dataset(dataset['id'], pk)
+    if result is None:
+        result = upload_files_for_comparison(old_upload, new_upload, map_path, pk)
     if result:
         st.session_state['result'] = result
 
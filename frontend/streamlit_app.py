@@ -12,7 +12,7 @@ map_path = st.sidebar.text_input("Mapping YAML Path", "mapping.yaml")
 # Refresh Dashboard Button
 if st.sidebar.button("🔄 Refresh Dashboard", help="Clear all results and refresh the dashboard"):
     # Clear all session state except file uploads
-    keys_to_clear = ['auto_pk', 'result', 'primary_key', 'current_files']
+    keys_to_clear = ['auto_pk', 'available_columns', 'result', 'primary_key', 'current_files']
     for key in keys_to_clear:
         if key in st.session_state:
             del st.session_state[key]
@@ -25,6 +25,43 @@ def upload_files_for_comparison(old_upload, new_upload, map_path, primary_key=No
         st.error(f"Upload failed: {e}")
         return None
 
+def detect_primary_key_for_files(old_upload, new_upload):
+    """Ask the backend for a primary key suggestion and the columns both files share, without comparing them."""
+    try:
+        old_upload.seek(0)
+        new_upload.seek(0)
+        files = {'old': old_upload, 'new': new_upload}
+
+        response = requests.post("http://localhost:5000/detect_pk", files=files)
+        if response.ok:
+            return response.json()
+        else:
+            st.error(response.text)
+            return None
+    except Exception as e:
+        st.error(f"Primary key detection failed: {e}")
+        return None
+
+def compare_uploaded_dataset(dataset_id, primary_key=None):
+    """Re-run the comparison of an uploaded pair with another primary key.
+    Returns None when the dataset handle has expired and the files must be uploaded again."""
+    try:
+        data = {'dataset': dataset_id}
+        if primary_key:
+            data['primary_key'] = primary_key
+
+        response = requests.post("http://localhost:5000/compare", json=data)
+        if response.ok:
+            return response.json()
+        elif response.status_code == 404:
+            return None
+        else:
+            st.error(response.text)
+            return {}
+    except Exception as e:
+        st.error(f"Comparison failed: {e}")
+        return {}
+
 def get_available_systems():
     """Load available systems from the database."""
     try:
@@ -169,10 +169,639 @@ def test_comparison_types():
     for exc in result['exceptions']:
         print(f"  ID {exc['id']}: {exc['field']} - '{exc['old']}' -> '{exc['new']}'")
 
+def test_exact_mismatches_vectorized():
+    """Columnar exact comparison must flag the same rows as a row-by-row check."""
+    from analysis.compare import _find_exact_mismatches
+
+    df = pd.DataFrame({
+        'val_old': ['a', 'b', None, 'd', None, 1, 2.0],
+        'val_new': ['a', 'x', 'c', None, None, '1', 2],
+    }, index=[10, 11, 12, 13, 14, 15, 16])
+
+    assert _find_exact_mismatches(df, 'val_old', 'val_new') == [11, 12, 13, 15]
+    assert _find_exact_mismatches(df, 'val_old', 'val_new', ignore_nulls=True) == [11, 15]
+
+def test_decimal_tolerances():
+    """Absolute, relative (percent) and ulps bands; non-numeric values are mismatches."""
+    from analysis.compare import _find_decimal_mismatches
+
+    df = pd.DataFrame({
+        'price_old': [100.0, 100.0, 1000.0, 0.1 + 0.2, '12.50', 'n/a', None, 5.0],
+        'price_new': [100.005, 100.5, 1004.0, 0.3, '12.5', 3.0, 7.0, None],
+    })
+
+    assert _find_decimal_mismatches(df, 'price_old', 'price_new', 0.01) == [1, 2, 5, 6, 7]
+    assert _find_decimal_mismatches(df, 'price_old', 'price_new', 0.01,
+                                    relative_tolerance=0.5) == [5, 6, 7]
+    assert _find_decimal_mismatches(df, 'price_old', 'price_new', None,
+                                    ignore_nulls=True, ulps=4) == [0, 1, 2, 5]
+
+def test_fuzzy_mismatches_deduplicated():
+    """Repeated (old, new) pairs are scored once but reported on every row."""
+    from analysis.compare import _find_fuzzy_mismatches
+
+    df = pd.DataFrame({
+        'loc_old': ['New York', 'NY', 'Chicago', 'NY', None, 'Chicago', 1.0],
+        'loc_new': ['New York!', 'New York', 'Chicago', 'New York', 'LA', None, '1'],
+    })
+
+    assert _find_fuzzy_mismatches(df, 'loc_old', 'loc_new', 80) == [1, 3, 4, 5, 6]
+    assert _find_fuzzy_mismatches(df, 'loc_old', 'loc_new', 80, ignore_nulls=True) == [1, 3, 6]
+
+def test_parallel_columns_match_serial():
+    """Shared-memory worker pool returns the same masks as the in-process path."""
+    from analysis.compare import _column_mismatch_mask
+    from analysis.mapping import compile_plan
+    from analysis.parallel import compare_columns_parallel
+
+    both = pd.DataFrame({
+        'name_old': ['ACME Corp', 'Beta LLC', None, 'Delta Co'],
+        'name_new': ['ACME  Corp', 'Beta Inc', 'Gamma', 'Delta Company'],
+        'price_old': [100.0, 250.5, 75.25, None],
+        'price_new': [100.0, 250.49, 75.3, 310.0],
+        'status_old': ['active', 'active', 'inactive', 'active'],
+        'status_new': ['active', 'inactive', 'inactive', 'active'],
+    })
+    fields = {
+        'name': {'type': 'string', 'fuzzy_match': 90},
+        'price': {'type': 'decimal', 'tolerance': 0.01},
+    }
+    columns = ['name', 'price', 'status']
+
+    plan = compile_plan({'fields': fields})
+    masks = compare_columns_parallel(both, columns, plan, False, 2)
+
+    assert list(masks) == columns
+    for col in columns:
+        expected = _column_mismatch_mask(both[f"{col}_old"], both[f"{col}_new"], plan.field(col))
+        assert masks[col].tolist() == expected.tolist()
+
+def test_partitioned_matches_in_memory():
+    """Hash-partitioned reconciliation gives the same result as a single in-memory run."""
+    from analysis.partitioned import run_partitioned_compare
+
+    df_old = pd.DataFrame({
+        'id': [5, 1, 4, 2, 3, 7],
+        'name': ['Eve', 'John', 'Alice', 'Jane', 'Bob', 'Zed'],
+        'score': [92.0, 85.5, 88.0, 90.0, 75.5, 60.0],
+    })
+    df_new = pd.DataFrame({
+        'id': [1, 2, 3, 4, 6, 5],
+        'name': ['John', 'Jane Doe', 'Bob', None, 'Carl', 'Eve'],
+        'score': [85.5, 90.0, 75.0, 89.0, 70.0, 92.0],
+    })
+    cfg = {
+        'include_missing_records': True,
+        'fields': {
+            'name': {'type': 'string', 'fuzzy_match': 90},
+            'score': {'type': 'decimal', 'tolerance': 0.1},
+        }
+    }
+
+    def chunks(df, size):
+        for start in range(0, len(df), size):
+            yield df.iloc[start:start + size]
+
+    expected = run_compare(df_old, df_new, ['id'], cfg)
+    result = run_partitioned_compare(chunks(df_old, 2), chunks(df_new, 4), ['id'], cfg, num_partitions=3)
+
+    assert result['match_pct'] == expected['match_pct']
+    assert result['stats'] == expected['stats']
+    assert [(e['id'], e['field']) for e in result['exceptions']] == \
+        [(e['id'], e['field']) for e in expected['exceptions']]
+
+def test_sorted_merge_matches_in_memory():
+    """Streaming sort-merge join agrees with the in-memory merge and rejects unsorted input."""
+    from analysis.sorted_merge import run_sorted_compare, UnsortedInputError
+
+    df_old = pd.DataFrame({
+        'id': [1, 2, 3, 4, 5, 8],
+        'name': ['John', 'Jane', 'Bob', 'Alice', 'Eve', 'Zed'],
+        'score': [85.5, 90.0, 75.5, 88.0, 92.0, 60.0],
+    })
+    df_new = pd.DataFrame({
+        'id': [2, 3, 4, 5, 6, 7],
+        'name': ['Jane Doe', 'Bob', None, 'Eve', 'Carl', 'Dan'],
+        'score': [90.0, 75.0, 89.0, 92.0, 70.0, 65.0],
+    })
+    cfg = {
+        'include_missing_records': True,
+        'fields': {'score': {'type': 'decimal', 'tolerance': 0.1}},
+    }
+
+    def chunks(df, size):
+        for start in range(0, len(df), size):
+            yield df.iloc[start:start + size]
+
+    expected = run_compare(df_old, df_new, ['id'], cfg)
+    result = run_sorted_compare(chunks(df_old, 2), chunks(df_new, 3), ['id'], cfg)
+
+    assert result['match_pct'] == expected['match_pct']
+    assert result['stats'] == expected['stats']
+    assert [(e['id'], e['field']) for e in result['exceptions']] == \
+        [(e['id'], e['field']) for e in expected['exceptions']]
+
+    try:
+        run_sorted_compare(chunks(df_old.iloc[::-1], 2), chunks(df_new, 3), ['id'], cfg)
+        assert False, "unsorted input should be rejected"
+    except UnsortedInputError:
+        pass
+
+def test_changed_rows():
+    """Only rows whose compared values differ are left for the comparators."""
+    from analysis.compare import changed_rows
+
+    both = pd.DataFrame({
+        'name_old': ['John', 'Jane', None, 'Bob', '1', 'Eve'],
+        'name_new': ['John', 'Jane', None, 'Rob', 1, 'Eve'],
+        'price_old': [1.0, 2.5, 3.0, 4.0, 5.0, 'n/a'],
+        'price_new': [1, '2.50', 3.0, 4.0, 5.0, 'n/a'],
+    })
+    fields = {'price': {'type': 'decimal', 'tolerance': 0.01}}
+
+    changed = changed_rows(both, ['name', 'price'], {'fields': fields})
+    assert changed.tolist() == [False, True, False, True, True, True]
+
+    # Skipping unchanged rows leaves every result as it was
+    import analysis.compare as compare_module
+    df_old, df_new = create_test_data()
+    cfg = {'fields': {'score': {'type': 'decimal', 'tolerance': 0.01}, 'name': {'fuzzy_match': 80}}}
+    result = run_compare(df_old, df_new, ['id'], cfg)
+    compare_module.changed_rows = lambda both_records, cols, plan: [True] * len(both_records)
+    try:
+        unfiltered = run_compare(df_old, df_new, ['id'], cfg)
+    finally:
+        compare_module.changed_rows = changed_rows
+    assert result['stats'] == unfiltered['stats']
+    assert result['exceptions'].frame.equals(unfiltered['exceptions'].frame)
+
+def test_date_comparison():
+    """Dates match across formats at the configured granularity."""
+    df_old = pd.DataFrame({
+        'id': [1, 2, 3, 4, 5, 6],
+        'date': ['2025-07-09', '2025-07-09', '2025-07-09 10:00:00', '2025-07-09', None, 'n/a'],
+    })
+    df_new = pd.DataFrame({
+        'id': [1, 2, 3, 4, 5, 6],
+        'date': ['09 Jul 2025', '2025/07/10', '2025-07-09 10:00:30', '2025/07/09', '2025-07-09', 'n/a'],
+    })
+    formats = ['%Y-%m-%d', '%d %b %Y', '%Y/%m/%d']
+
+    by_day = run_compare(df_old, df_new, ['id'], {'fields': {'date': {'type': 'date', 'formats': formats}}})
+    assert [e['id'] for e in by_day['exceptions']] == [2, 5]
+
+    by_second = run_compare(df_old, df_new, ['id'], {
+        'fields': {'date': {'type': 'date', 'formats': formats, 'granularity': 'second'}}
+    })
+    assert [e['id'] for e in by_second['exceptions']] == [2, 3, 5]
+
+def test_composite_key_surrogate():
+    """Composite keys merge on an int64 surrogate and decode back for exceptions."""
+    from analysis import compare
+
+    df_old = pd.DataFrame({
+        'acct': ['b', 'a', 'a', None, 'c'],
+        'seq': [1, 2, 1, 1, 1],
+        'amount': [10, 20, 30, 40, 50],
+    })
+    df_new = pd.DataFrame({
+        'acct': ['a', 'a', 'b', None, 'd'],
+        'seq': [1, 2, 1, 1, 1],
+        'amount': [30, 21, 10, 41, 60],
+    })
+    cfg = {'include_missing_records': True}
+
+    def exception_keys(result):
+        return [(None if pd.isna(e['acct']) else e['acct'], e['seq'], e['field']) for e in result['exceptions']]
+
+    keys = exception_keys(run_compare(df_old, df_new, ['acct', 'seq'], cfg))
+    assert keys == [('c', 1, '_record_status'), ('d', 1, '_record_status'),
+                    ('a', 2, 'amount'), (None, 1, 'amount')]
+
+    # Re-densifying the running key between columns gives the same result
+    limit = compare._SURROGATE_KEY_LIMIT
+    compare._SURROGATE_KEY_LIMIT = 2
+    try:
+        again = run_compare(df_old, df_new, ['acct', 'seq'], cfg)
+    finally:
+        compare._SURROGATE_KEY_LIMIT = limit
+    assert exception_keys(again) == keys
+
+    # Decoded keys keep the order, dtype and nulls of a merge on the key
+    # columns: NaT sorts first, int joined with float is float
+    df_old = pd.DataFrame({'day': pd.to_datetime(['2025-01-02', None, '2025-01-01']),
+                           'seq': [1, 2, 3], 'amount': [1, 2, 3]})
+    df_new = pd.DataFrame({'day': pd.to_datetime(['2025-01-01', None, '2025-01-05']),
+                           'seq': [3.0, 2.0, None], 'amount': [3, 9, 5]})
+    expected = df_old.merge(df_new, on=['day', 'seq'], suffixes=('_old', '_new'), how='outer', indicator=True)
+    merged, record_keys = compare._merge_on_keys(df_old, df_new, ['day', 'seq'])
+    decoded = record_keys(merged)
+    assert decoded.equals(expected[['day', 'seq']])
+    assert merged['amount_old'].equals(expected['amount_old'])
+    assert merged['amount_new'].equals(expected['amount_new'])
+
+def test_duplicate_keys():
+    """Repeated keys are reported and resolved by policy instead of multiplying out."""
+    from analysis.compare import DuplicateKeyError
+
+    df_old = pd.DataFrame({'id': [1, 2, 2, 3, 3, 3], 'v': [1, 2, 3, 4, 5, 6]})
+    df_new = pd.DataFrame({'id': [1, 2, 2, 2, 3], 'v': [1, 2, 9, 8, 4]})
+
+    def run(policy):
+        return run_compare(df_old, df_new, ['id'], {'duplicate_keys': policy, 'include_missing_records': True})
+
+    pair = run('pair')
+    duplicates = [(e['id'], e['old'], e['new']) for e in pair['exceptions'] if e.get('change_type') == 'duplicate_key']
+    assert duplicates == [(2, 2, 3), (3, 3, 1)]
+    assert pair['stats']['records_in_both'] == 4
+    assert [(e['id'], e.get('change_type', e['field'])) for e in pair['exceptions']][2:] == \
+        [(3, 'deleted_record'), (3, 'deleted_record'), (2, 'added_record'), (2, 'v')]
+
+    assert run('keep_first')['stats']['field_exceptions'] == 0
+    assert run('keep_last')['stats']['field_exceptions'] == 2
+
+    try:
+        run('reject')
+        assert False, "duplicate keys should be rejected"
+    except DuplicateKeyError:
+        pass
+
+def test_summary_only():
+    """summary_only counts the same exceptions as a full run without materializing them."""
+    from analysis.partitioned import run_partitioned_compare
+
+    df_old, df_new = create_test_data()
+    cfg = {'include_missing_records': True}
+    full = run_compare(df_old, df_new, ['id'], cfg)
+    summary = run_compare(df_old, df_new, ['id'], {**cfg, 'summary_only': True})
+
+    assert len(summary['exceptions']) == 0
+    assert summary['match_pct'] == full['match_pct']
+    assert summary['stats']['exception_count'] == full['stats']['exception_count'] == len(full['exceptions'])
+    counts = summary['stats']['field_exception_counts']
+    assert counts == {col: sum(1 for e in full['exceptions'] if e['field'] == col) for col in counts}
+
+    partitioned = run_partitioned_compare([df_old], [df_new], ['id'], {**cfg, 'summary_only': True}, num_partitions=3)
+    assert partitioned['stats']['exception_count'] == len(full['exceptions'])
+    assert partitioned['stats']['field_exception_counts'] == counts
+
+def test_stage_timings():
+    """Stages run inside an active recorder are timed and added up per name; outside they are not."""
+    import numpy as np
+    from analysis import instrumentation
+    from analysis.instrumentation import StageTimings
+
+    df_old, df_new = create_test_data()
+    run_compare(df_old, df_new, ['id'], {})
+
+    cfg = {'fields': {'score': {'type': 'decimal', 'tolerance': 0.01}}}
+    timings = StageTimings('tracemalloc')
+    with timings.activate():
+        run_compare(df_old, df_new, ['id'], cfg)
+        run_compare(df_old, df_new, ['id'], cfg)
+    stages = {t['stage']: t for t in timings.to_list()}
+    assert list(stages)[0] == 'merge'
+    assert {'prefilter', 'compare:name', 'compare:score'} <= set(stages)
+    assert stages['merge']['calls'] == 2
+    assert all(t['wall_ms'] >= 0 and t['peak_memory_mb'] >= 0 for t in stages.values())
+
+    # rss figures are per stage: a small stage after a big one is not charged
+    # the big one's peak, and an outer stage includes its nested stages' peaks
+    if instrumentation._RSS_PEAK_RESETTABLE:
+        timings = StageTimings('rss')
+        with timings.activate():
+            with timings.stage('outer'):
+                with timings.stage('big'):
+                    block = np.ones(100 * 1024 * 1024 // 8)
+                    del block
+            with timings.stage('small'):
+                pass
+        stages = {t['stage']: t['peak_memory_mb'] for t in timings.to_list()}
+        assert stages['big'] >= 90 and stages['outer'] >= stages['big']
+        assert stages['small'] < 10
+
+def test_pipeline_profiler():
+    """A profiled run reports hot functions and collapsed stacks rooted at the caller."""
+    from analysis.profiling import PipelineProfiler, ProfilerBusyError
+
+    df_old, df_new = create_test_data()
+    with PipelineProfiler(top_n=5, sample_interval=0.001) as profiler:
+        for _ in range(20):
+            run_compare(df_old, df_new, ['id'], {})
+        try:
+            with PipelineProfiler():
+                pass
+            assert False, "only one run can be profiled at a time"
+        except ProfilerBusyError:
+            pass
+    report = profiler.report()
+
+    assert len(report['top_functions']) == 5
+    assert report['samples'] > 0
+    assert all(line.startswith('test_pipeline_profiler') for line in report['stacks'].splitlines())
+    assert 'run_compare' in report['stacks']
+
+def test_csv_loader_uses_mapping():
+    """CSV files are read with the mapping's dtypes, without ignored columns, in their detected encoding."""
+    import tempfile
+    from helpers import parse_csv_file, iter_file_chunks, detect_file_encoding
+
+    plan = {'pk': ['id'], 'fields': {'price': {'type': 'decimal', 'tolerance': 0.01}, 'qty': {'type': 'integer'},
+                                     'code': {'type': 'string'}, 'vendor': {'type': 'ignore'}}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data.csv')
+        with open(path, 'wb') as f:
+            f.write('\ufeffID,Price,Qty,Code,Vendor\n1,1.5,2,007,Caf\u00e9\n2,,,010,x\n'.encode('utf-8'))
+        assert detect_file_encoding(path) == 'utf-8-sig'
+        df = parse_csv_file(path, plan)
+        assert list(df.columns) == ['ID', 'Price', 'Qty', 'Code']
+        assert str(df['Price'].dtype) == 'float64' and str(df['Qty'].dtype) == 'Int64'
+        assert list(df['Code']) == ['007', '010']
+        assert [len(chunk) for chunk in iter_file_chunks(path, 'data.csv', 1, plan)] == [1, 1]
+
+        with open(path, 'wb') as f:
+            f.write('ID,Price,Vendor\n1,abc,Caf\u00e9\n'.encode('latin-1'))
+        assert detect_file_encoding(path) == 'latin-1'
+        df = parse_csv_file(path, plan)
+        assert list(df['Price']) == ['abc']
+        assert list(parse_csv_file(path)['Vendor']) == ['Caf\u00e9']
+
+        # 20-digit keys stay exact; duplicate and blank header names are made unique as read_csv does
+        with open(path, 'w') as f:
+            f.write('ID,A,A,\n12345678901234567890,1,2,3\n12345678901234567891,4,5,6\n')
+        df = parse_csv_file(path)
+        assert list(df.columns) == ['ID', 'A', 'A.1', 'Unnamed: 3']
+        assert list(df['ID']) == [12345678901234567890, 12345678901234567891] and df['ID'].is_unique
+
+def test_csv_chunks_share_types():
+    """Every chunk of a CSV file gets the types of the first chunk, so chunked modes match a full read."""
+    import tempfile
+    from helpers import parse_csv_file, iter_file_chunks
+    from analysis.partitioned import run_partitioned_compare
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = os.path.join(tmp, 'old.csv'), os.path.join(tmp, 'new.csv')
+        # qty gets a blank and price whole numbers only after the first chunk
+        with open(old_path, 'w') as f:
+            f.write('id,qty,price,note\n1,5,1.5,a\n2,6,2.5,b\n3,,3,c\n4,8,4,d\n5,9,5,e\n')
+        with open(new_path, 'w') as f:
+            f.write('id,qty,price,note\n1,5,1.5,a\n2,6,2.5,b\n3,,3,c\n4,7,4,d\n5,9,5.5,e\n')
+
+        chunks = list(iter_file_chunks(old_path, 'old.csv', 2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert all(list(chunk.dtypes.astype(str)) == list(chunks[0].dtypes.astype(str)) for chunk in chunks)
+        assert str(chunks[0]['qty'].dtype) == 'Int64' and str(chunks[0]['price'].dtype) == 'float64'
+
+        expected = run_compare(parse_csv_file(old_path), parse_csv_file(new_path), ['id'], {})
+        result = run_partitioned_compare(iter_file_chunks(old_path, 'old.csv', 2), iter_file_chunks(new_path, 'new.csv', 2),
+                                         ['id'], {}, num_partitions=2)
+        assert result['stats'] == expected['stats']
+        assert sorted((e['id'], e['field']) for e in result['exceptions']) == [(4, 'qty'), (5, 'price')]
+
+        # Text after numeric first chunks cannot keep the column's type
+        with open(old_path, 'w') as f:
+            f.write('id,qty\n1,5\n2,6\n3,many\n')
+        try:
+            list(iter_file_chunks(old_path, 'old.csv', 2))
+            assert False, "a value that does not fit the first chunk's types is an error"
+        except ValueError as e:
+            assert 'type: string' in str(e)
+
+def test_xml_streaming():
+    """The XML reader finds the record tag, streams records in chunks and reads them like pandas.read_xml."""
+    import tempfile
+    from analysis.xml_stream import detect_record_tag, iter_xml_chunks, read_xml
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'trades.xml')
+        with open(path, 'w') as f:
+            f.write('<feed xmlns="urn:trades"><header><source>x</source></header><trades>'
+                    '<trade id="1"><price>1.5</price><legs><leg><n>1</n></leg><leg><n>2</n></leg></legs></trade>'
+                    '<trade id="2"><price></price><book>A</book></trade>'
+                    '<trade id="3"><price>3</price><book>B</book></trade></trades></feed>')
+        assert detect_record_tag(path) == '{urn:trades}trade'
+        assert [len(chunk) for chunk in iter_xml_chunks(path, 2)] == [2, 1]
+        df = read_xml(path)
+        assert list(df.columns) == ['id', 'price', 'legs', 'book']
+        assert list(df['id']) == [1, 2, 3]
+        assert df['price'].isna().tolist() == [False, True, False]
+
+        with open(path, 'w') as f:
+            f.write('<products><product><id>1</id><name>a</name></product><product><id>2</id><name>b</name></product></products>')
+        pd.testing.assert_frame_equal(read_xml(path), pd.read_xml(path))
+
+def test_excel_reader():
+    """Excel sheets are read as the mapping selects them, without ignored columns, like pandas.read_excel."""
+    import tempfile
+    from datetime import date, datetime
+    import openpyxl
+    from analysis import excel_stream
+    from helpers import parse_excel_file, iter_file_chunks
+
+    plan = {'pk': ['id'], 'sheet': ['Bonds', 'Equities'], 'fields': {'vendor': {'type': 'ignore'}}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'positions.xlsx')
+        workbook = openpyxl.Workbook()
+        workbook.active.title = 'Equities'
+        workbook.active.append(['ID', 'Price', 'Vendor'])
+        workbook.active.append([1, 1.5, 'a'])
+        workbook.active.append([2, None, 'b'])
+        bonds = workbook.create_sheet('Bonds')
+        bonds.append(['ID', 'Price', 'Vendor'])
+        bonds.append([3, 7.0, 'c'])
+        # Dates become datetime64; whole numbers in a text column stay integers
+        trades = workbook.create_sheet('Trades')
+        trades.append(['ID', 'Traded', 'Code'])
+        trades.append([1, date(2024, 1, 5), 12.0])
+        trades.append([2, datetime(2024, 2, 6, 10, 30), 'A7'])
+        trades.append([3, None, 7])
+        workbook.save(path)
+
+        calamine = excel_stream.python_calamine
+        for engine in (calamine, None) if calamine else (None,):
+            excel_stream.python_calamine = engine
+            try:
+                df = parse_excel_file(path)
+                pd.testing.assert_frame_equal(df, pd.read_excel(path, engine='openpyxl'))
+                df = excel_stream.read_excel(path, ['Trades'])
+                for reader in ('calamine', 'openpyxl') if calamine else ('openpyxl',):
+                    pd.testing.assert_frame_equal(df, pd.read_excel(path, sheet_name='Trades', engine=reader))
+                assert df['Traded'].dtype.kind == 'M' and list(df['Code']) == [12, 'A7', 7]
+                df = parse_excel_file(path, plan)
+                assert list(df.columns) == ['ID', 'Price']
+                assert list(df['ID']) == [3, 1, 2] and str(df['ID'].dtype) == 'int64'
+                assert [len(chunk) for chunk in iter_file_chunks(path, 'positions.xlsx', 1, plan)] == [1, 1, 1]
+            finally:
+                excel_stream.python_calamine = calamine
+
+def test_parse_cache():
+    """Normalized frames round-trip through the Parquet cache, keyed by content and parsing settings, with LRU eviction."""
+    import tempfile
+    from analysis import parse_cache
+    from analysis.mapping import compile_plan
+
+    if parse_cache.pyarrow is None:
+        return  # the cache is disabled without pyarrow
+
+    plan = compile_plan({'pk': ['id'], 'fields': {'price': {'type': 'decimal'}}})
+    df = pd.DataFrame({'id': [1, 2], 'price': [1.5, None], 'name': pd.array(['a', None], dtype='str'),
+                       'qty': pd.array([1, None], dtype='Int64')})
+    with tempfile.TemporaryDirectory() as tmp:
+        upload = os.path.join(tmp, 'upload.csv')
+        with open(upload, 'w') as f:
+            f.write('id,price\n1,1.5\n')
+        cache = parse_cache.ParseCache(os.path.join(tmp, 'cache'), max_mb=1)
+        key = cache.key(upload, 'upload.csv', plan)
+        assert key == cache.key(upload, 'other_name.csv', plan.with_settings(mode='sample', ignore_nulls=True))
+        assert key != cache.key(upload, 'upload.xml', plan)
+        assert key != cache.key(upload, 'upload.csv', plan.with_settings(fields={'price': {'type': 'string'}}))
+
+        assert cache.get(key) is None
+        assert cache.put(key, df)
+        pd.testing.assert_frame_equal(cache.get(key), df)
+
+        # Least recently used entries go first once the cache is over its size
+        cache.max_bytes = 2 * os.path.getsize(cache._path(key)) + 1
+        os.utime(cache._path(key), (1, 1))
+        for other in ('a', 'b'):
+            cache.put(other, df)
+        assert cache.get(key) is None and cache.get('a') is not None and cache.get('b') is not None
+
+def test_dataset_store():
+    """Dataset handles return the stored pair, expire after their TTL and make room for new pairs."""
+    import time
+    from analysis.datasets import DatasetStore
+
+    store = DatasetStore(ttl_seconds=60, max_entries=2)
+    df = pd.DataFrame({'id': [1]})
+    first = store.put(df, df, system_name='a')
+    second = store.put(df, df, system_name='b')
+    assert store.get(first)['system_name'] == 'a' and store.get(first)['old'] is df
+    # first was used last, so a third pair replaces second
+    third = store.put(df, df, system_name='c')
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+    assert store.get('unknown') is None
+
+    store.ttl_seconds = 0.01
+    expiring = store.put(df, df)
+    time.sleep(0.02)
+    assert store.get(expiring) is None
+
+def test_primary_key_suggestion():
+    """Key candidates are ranked on samples and checked by reading only their columns."""
+    import tempfile
+    from analysis.mapping import rank_key_candidates, detect_primary_key
+    from helpers import read_file_sample, read_csv_columns
+
+    df_old = pd.DataFrame({'sku': ['a', None, 'c'], 'id': [1, 2, 3], 'name': ['x', 'x', 'y']})
+    df_new = pd.DataFrame({'id': [3, 2, 1], 'sku': ['c', 'b', 'a'], 'name': ['x', 'y', 'z']})
+    # sku is unique but has a null, so id ranks first; name repeats in old
+    assert rank_key_candidates(df_old, df_new) == ['id', 'sku']
+    assert rank_key_candidates(df_old[['name']], df_new) == []
+    assert detect_primary_key(df_old, df_new) == ['sku']
+
+    plan = {'fields': {'code': {'type': 'string'}, 'vendor': {'type': 'ignore'}}}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'data.csv')
+        with open(path, 'w') as f:
+            f.write('ID,Code,Vendor\n' + ''.join(f'{i},{i:03d},v\n' for i in range(10)))
+        sample = read_file_sample(path, 'data.csv', 4, plan)
+        assert list(sample.columns) == ['ID', 'Code'] and len(sample) == 4
+        df = read_csv_columns(path, ['Code'], 8, plan)
+        assert list(df.columns) == ['Code'] and list(df['Code'][:2]) == ['000', '001'] and len(df) == 8
+
+def test_sample_mode():
+    """A key-hash sample picks the same keys on both sides and brackets the full match rate."""
+    import numpy as np
+    from analysis.sampling import run_sample_compare, sample_by_key
+
+    rng = np.random.default_rng(7)
+    n = 20000
+    df_old = pd.DataFrame({'id': np.arange(n), 'a': rng.integers(0, 5, n), 'b': rng.integers(0, 5, n)})
+    df_new = df_old.sample(frac=1, random_state=1).reset_index(drop=True)
+    changed = rng.random(n) < 0.05
+    df_new.loc[changed, 'a'] += 1
+    df_new.loc[changed & (rng.random(n) < 0.5), 'b'] += 1
+
+    assert set(sample_by_key(df_old, ['id'], 0.1)['id']) == set(sample_by_key(df_new, ['id'], 0.1)['id'])
+
+    full = run_compare(df_old, df_new, ['id'], {})
+    sampled = run_sample_compare([df_old[:n // 2], df_old[n // 2:]], [df_new], ['id'], {}, sample_rate=0.1)
+    low, high = sampled['match_pct_ci']
+    assert low <= full['match_pct'] <= high
+    assert sampled['sample']['rows_read_old'] == n
+    assert 0 < sampled['sample']['rows_sampled_old'] < n / 5
+    assert set(sampled['field_mismatch_rates']) == {'a', 'b'}
+
+def test_comparison_plan():
+    """load_mapping compiles once per file content and resolves renamed columns."""
+    import tempfile
+    from analysis import etl, mapping
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'mapping.yaml')
+        with open(path, 'w') as f:
+            f.write("pk: [id]\nfields:\n  Label:\n    type: string\n    rename_to: name\n"
+                    "    clean: [strip_whitespace, lowercase]\n  vendor:\n    type: ignore\n")
+        plan = mapping.load_mapping(path)
+        assert mapping.load_mapping(path) is plan
+        assert plan['pk'] == ('id',) and plan.get('mode', 'full') == 'full'
+        assert plan.field('name').clean == ('strip_whitespace', 'lowercase')
+        assert plan.ignored == {'vendor'}
+        assert plan.with_settings(parallel_workers=4).parallel_workers == 4
+        assert plan.parallel_workers == 1
+
+    df_old = etl.normalize(pd.DataFrame({'ID': [1, 2], 'Label': [' Acme ', 'Beta'], 'Vendor': ['a', 'b']}), plan)
+    df_new = etl.normalize(pd.DataFrame({'ID': [1, 2], 'Label': ['acme', 'BETA '], 'Vendor': ['c', 'd']}), plan)
+    assert list(df_old.columns) == ['id', 'name', 'vendor']
+    result = run_compare(df_old, df_new, ['id'], plan)
+    assert result['match_pct'] == 100.0 and result['stats']['compared_fields'] == ['name']
+
+def test_exception_table_summaries():
+    """Columnar exceptions keep the dict view and match per-row summaries."""
+    from analysis.exception_builder import add_summary_to_exceptions, build_summary
+
+    df_old, df_new = create_test_data()
+    cfg = {'include_missing_records': True, 'fields': {'age': {'type': 'integer'}}}
+    result = run_compare(df_old, df_new.iloc[:5], ['id'], cfg)
+    exceptions = add_summary_to_exceptions(result['exceptions'], cfg)
+
+    records = exceptions.to_dicts()
+    assert len(records) == len(exceptions) == 8
+    assert records[0]['change_type'] == 'deleted_record'
+    assert all('change_type' not in r for r in records[1:])
+    for r in records[1:]:
+        field_type = cfg['fields'].get(r['field'], {}).get('type')
+        assert r['summary'] == build_summary(r['old'], r['new'], field_type)
+
 if __name__ == "__main__":
     try:
         test_null_handling()
         test_comparison_types()
+        test_exact_mismatches_vectorized()
+        test_decimal_tolerances()
+        test_fuzzy_mismatches_deduplicated()
+        test_parallel_columns_match_serial()
+        test_partitioned_matches_in_memory()
+        test_sorted_merge_matches_in_memory()
+        test_changed_rows()
+        test_date_comparison()
+        test_composite_key_surrogate()
+        test_duplicate_keys()
+        test_summary_only()
+        test_stage_timings()
+        test_pipeline_profiler()
+        test_csv_loader_uses_mapping()
+        test_csv_chunks_share_types()
+        test_xml_streaming()
+        test_excel_reader()
+        test_parse_cache()
+        test_dataset_store()
+        test_primary_key_suggestion()
+        test_sample_mode()
+        test_comparison_plan()
+        test_exception_table_summaries()
         print("\n" + "="*60)
         print("ALL TESTS COMPLETED SUCCESSFULLY!")
         print("="*60)